@@ -10,6 +10,7 @@ from app.schemas.search_system import (
     RecommendationSchema
 )
 from app.services.search_system_service import SearchSystemService
+from app.middleware.audit_middleware import AsyncSessionLocal
 from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter()
@@ -29,7 +30,8 @@ async def perform_search(
     - **types**: Filter results to specific types of content.
     - **page** & **page_size**: Control pagination of the results.
     """
-    service = SearchSystemService(db)
+    # The session factory lets suggestions and analytics run off the request's session
+    service = SearchSystemService(db, session_factory=AsyncSessionLocal)
     filters = {}
     if types:
         filters["types"] = types
@@ -1,8 +1,11 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, AsyncIterator
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.dependencies import get_db, get_current_user
+from app.core.auth import get_current_admin_user
 from app.models.user import User
 from app.models.security_system import EventType, SeverityLevel
 from app.schemas.security_system import AuditLogSchema, SecurityEventSchema
@@ -10,6 +13,10 @@ from app.services.security_system_service import SecuritySystemService
 
 router = APIRouter()
 
+async def _ndjson(items: AsyncIterator[BaseModel]) -> AsyncIterator[str]:
+    async for item in items:
+        yield item.model_dump_json() + "\n"
+
 @router.get("/audit-logs", response_model=List[AuditLogSchema])
 async def get_audit_logs(
     skip: int = 0,
@@ -31,6 +38,22 @@ async def get_audit_logs(
     )
     return logs
 
+@router.get("/audit-logs/export", response_class=StreamingResponse)
+async def export_audit_logs(
+    user_id: Optional[int] = Query(None, description="Filter by user ID"),
+    event_type: Optional[EventType] = Query(None, description="Filter by event type"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Dict[str, Any] = Depends(get_current_admin_user)
+):
+    """
+    Stream all matching audit logs as newline-delimited JSON. Requires administrative privileges.
+    """
+    service = SecuritySystemService(db)
+    return StreamingResponse(
+        _ndjson(service.stream_audit_logs(user_id=user_id, event_type=event_type)),
+        media_type="application/x-ndjson"
+    )
+
 @router.get("/security-events", response_model=List[SecurityEventSchema])
 async def get_security_events(
     skip: int = 0,
@@ -52,6 +75,22 @@ async def get_security_events(
     )
     return events
 
+@router.get("/security-events/export", response_class=StreamingResponse)
+async def export_security_events(
+    is_resolved: Optional[bool] = Query(None, description="Filter by resolution status"),
+    severity: Optional[SeverityLevel] = Query(None, description="Filter by severity level"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Dict[str, Any] = Depends(get_current_admin_user)
+):
+    """
+    Stream all matching security events as newline-delimited JSON. Requires administrative privileges.
+    """
+    service = SecuritySystemService(db)
+    return StreamingResponse(
+        _ndjson(service.stream_security_events(is_resolved=is_resolved, severity=severity)),
+        media_type="application/x-ndjson"
+    )
+
 @router.put("/security-events/{event_id}/resolve", response_model=SecurityEventSchema)
 async def resolve_security_event(
     event_id: int,
@@ -1,8 +1,9 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.dependencies import get_db, get_current_user
+from app.core.auth import get_current_admin_user
 from app.models.user import User
 from app.models.smart_reminder_system import ModelType
 from app.schemas.smart_reminder_system import (
@@ -151,6 +152,37 @@ async def create_ml_model(
     service = SmartReminderSystemService(db)
     return await service.create_ml_model(model_data=model_in)
 
+@router.post("/ml-models/retrain", status_code=202, tags=["admin"])
+async def retrain_ml_model(
+    model_type: ModelType,
+    db: AsyncSession = Depends(get_db),
+    current_user: Dict[str, Any] = Depends(get_current_admin_user)
+):
+    """
+    Start retraining models of a type in the background. (Admin)
+    """
+    service = SmartReminderSystemService(db)
+    try:
+        job_id = await service.retrain_model(model_type)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"job_id": job_id, "status": "training"}
+
+@router.get("/ml-models/retrain/{job_id}", tags=["admin"])
+async def get_retrain_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: Dict[str, Any] = Depends(get_current_admin_user)
+):
+    """
+    Poll the status of a retraining job. (Admin)
+    """
+    service = SmartReminderSystemService(db)
+    job = service.get_retrain_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Retraining job not found")
+    return job
+
 @router.post("/log-behavior/", response_model=UserBehaviorPattern, status_code=201, tags=["system"])
 async def log_user_behavior(
     pattern_in: UserBehaviorPatternCreate,
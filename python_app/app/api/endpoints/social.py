@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from typing import List, Dict
+from typing import List, Dict, Optional
 from sqlalchemy.orm import Session
 
 from app.models import BaseResponse
@@ -173,12 +173,18 @@ def get_friends(
 )
 def get_social_feed(
     limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Get the current user's social feed, showing recent activity from friends.
     """
-    feed_data = social_service.get_social_feed(db, current_user.id, limit)
-    items = [FeedItem(**item) for item in feed_data]
-    return SocialFeed(items=items) 
\ No newline at end of file
+    try:
+        feed_data = social_service.get_social_feed(db, current_user.id, limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return SocialFeed(
+        items=[FeedItem(**item) for item in feed_data["items"]],
+        next_cursor=feed_data["next_cursor"]
+    ) 
\ No newline at end of file
@@ -12,7 +12,7 @@ from app.models.user_profile_system import (
     ProfileVisibility, ThemePreference, LanguageCode, UnitSystem, ActivityLevel,
     NotificationFrequency, DataSharingLevel, PrivacyLevel,
     UserProfileCreate, UserProfileUpdate, UserPreferencesUpdate,
-    UserPrivacySettingsUpdate, UserCustomizationsUpdate,
+    UserPrivacySettingsUpdate, UserCustomizationsUpdate, AvatarUploadComplete,
     UserProfileResponse, UserPreferencesResponse, UserPrivacySettingsResponse,
     UserHealthProfileResponse
 )
@@ -188,6 +188,7 @@ async def delete_user_profile(
 # Avatar Management
 @router.post("/profile/avatar", response_model=Dict[str, Any])
 async def upload_avatar(
+    background_tasks: BackgroundTasks,
     avatar: UploadFile = File(...),
     current_user: User = Depends(get_current_user),
     service: UserProfileSystemService = Depends(get_profile_service)
@@ -206,7 +207,8 @@ async def upload_avatar(
             raise HTTPException(status_code=400, detail="File too large. Maximum size is 5MB.")
         
         # Upload avatar
-        avatar_url = service.upload_avatar(current_user.id, avatar_data, avatar.filename)
+        # Resizing and the S3 upload run after the response is sent
+        avatar_url = service.upload_avatar(current_user.id, avatar_data, avatar.filename, background_tasks)
         if not avatar_url:
             raise HTTPException(status_code=500, detail="Failed to upload avatar")
         
@@ -242,6 +244,53 @@ async def delete_avatar(
         logger.error(f"Error deleting avatar: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/profile/avatar/upload-url", response_model=Dict[str, Any])
+async def create_avatar_upload_url(
+    current_user: User = Depends(get_current_user),
+    service: UserProfileSystemService = Depends(get_profile_service)
+):
+    """Get a presigned POST for uploading an avatar directly to storage"""
+    try:
+        upload = service.generate_avatar_upload_url(current_user.id)
+        if not upload:
+            raise HTTPException(status_code=503, detail="Direct avatar upload is not available")
+        
+        return {
+            "success": True,
+            "upload": upload
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error creating avatar upload URL: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/profile/avatar/finalize", response_model=Dict[str, Any])
+async def finalize_avatar_upload(
+    background_tasks: BackgroundTasks,
+    upload: AvatarUploadComplete,
+    current_user: User = Depends(get_current_user),
+    service: UserProfileSystemService = Depends(get_profile_service)
+):
+    """Use an avatar uploaded through the presigned POST"""
+    try:
+        avatar_url = service.finalize_avatar(current_user.id, upload.s3_key, background_tasks)
+        if not avatar_url:
+            raise HTTPException(status_code=500, detail="Failed to finalize avatar")
+        
+        return {
+            "success": True,
+            "message": "Avatar uploaded successfully",
+            "avatar_url": avatar_url
+        }
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error finalizing avatar upload: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Preferences Management
 @router.get("/preferences", response_model=UserPreferencesResponse)
 async def get_user_preferences(
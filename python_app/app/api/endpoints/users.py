@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Query, Response, UploadFile, File
 from typing import List, Optional
+from datetime import datetime
 import logging
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
@@ -149,9 +150,14 @@ def delete_my_account(
 
 # Admin endpoints
 @router.get("/", response_model=List[User], dependencies=[Depends(get_current_admin_user)])
-def get_all_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_all_users(
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = Query(None, description="ID of the last user on the previous page"),
+    db: Session = Depends(get_db)
+):
     """[Admin] Get all users with pagination."""
-    return user_service.get_all_users(db, skip=skip, limit=limit)
+    return user_service.get_all_users(db, skip=skip, limit=limit, after_id=after_id)
 
 
 @router.get("/search", response_model=List[User], dependencies=[Depends(get_current_admin_user)])
@@ -473,11 +479,12 @@ def get_my_streak_summary(
 @router.get("/me/streaks", response_model=List[DailyStreak])
 def get_my_daily_streaks(
     limit: int = Query(30, ge=1, le=365),
+    before: Optional[datetime] = Query(None, description="Date of the last record on the previous page"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get daily streak records for current user."""
-    return user_service.get_daily_streaks(db, current_user.id, limit)
+    return user_service.get_daily_streaks(db, current_user.id, limit, before=before)
 
 
 @router.get("/me/streaks/stats")
@@ -513,6 +520,7 @@ def get_user_streak_summary(
 def get_user_daily_streaks(
     user_id: int,
     limit: int = Query(30, ge=1, le=365),
+    before: Optional[datetime] = Query(None, description="Date of the last record on the previous page"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -527,7 +535,7 @@ def get_user_daily_streaks(
     if not profile or (not profile.is_public and user_id != current_user.id):
         raise HTTPException(status_code=403, detail="Access denied")
     
-    return user_service.get_daily_streaks(db, user_id, limit)
+    return user_service.get_daily_streaks(db, user_id, limit, before=before)
 
 
 @router.get("/{user_id}/streaks/stats")
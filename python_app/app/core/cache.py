@@ -1,6 +1,13 @@
+import copy
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
 from functools import lru_cache, wraps
 from datetime import datetime, timedelta
 
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
 def timed_lru_cache(seconds: int, maxsize: int = 128):
     """
     A time-aware LRU cache decorator.
@@ -34,4 +41,147 @@ def timed_lru_cache(seconds: int, maxsize: int = 128):
         
         return wrapped_func
 
-    return wrapper_cache 
\ No newline at end of file
+    return wrapper_cache
+
+
+def async_timed_lru_cache(seconds: int, maxsize: int = 128, key: Optional[Callable[..., Hashable]] = None):
+    """
+    A time-aware LRU cache decorator for coroutine functions.
+
+    Unlike timed_lru_cache, each entry expires on its own and the awaited
+    result is cached rather than the (single-use) coroutine object.
+    Exceptions and None results are not cached, so a missing record is
+    looked up again on the next call. wrapped.cache_invalidate(*args,
+    **kwargs) drops the entry for those call arguments.
+
+    Args:
+        seconds (int): The lifetime of each cached result in seconds.
+        maxsize (int): The maximum number of cached results.
+        key (callable): Optional function of the call arguments returning the
+            cache key, for calls whose arguments include unhashable or
+            per-request objects such as a database session.
+    """
+    def wrapper_cache(func):
+        cache = OrderedDict()
+
+        def make_key(*args, **kwargs):
+            if key is not None:
+                return key(*args, **kwargs)
+            return (args, tuple(sorted(kwargs.items()))) if kwargs else args
+
+        @wraps(func)
+        async def wrapped_func(*args, **kwargs):
+            cache_key = make_key(*args, **kwargs)
+            entry = cache.get(cache_key)
+            if entry is not None:
+                expires_at, result = entry
+                if time.monotonic() < expires_at:
+                    cache.move_to_end(cache_key)
+                    return result
+                del cache[cache_key]
+
+            result = await func(*args, **kwargs)
+            if result is None:
+                return result
+            cache[cache_key] = (time.monotonic() + seconds, result)
+            cache.move_to_end(cache_key)
+            if len(cache) > maxsize:
+                cache.popitem(last=False)
+            return result
+
+        def cache_invalidate(*args, **kwargs):
+            cache.pop(make_key(*args, **kwargs), None)
+
+        wrapped_func.cache_clear = cache.clear
+        wrapped_func.cache_invalidate = cache_invalidate
+        return wrapped_func
+
+    return wrapper_cache
+
+
+class TTLCache:
+    """
+    An in-process key/value cache with per-entry expiry and LRU eviction.
+
+    Meant for cache-aside reads whose keys are invalidated explicitly when
+    the underlying data changes. Invalidation only reaches the current
+    process, so other workers may serve a value until it expires.
+
+    Args:
+        seconds (int): The lifetime of each entry in seconds.
+        maxsize (int): The maximum number of entries.
+    """
+    def __init__(self, seconds: int, maxsize: int = 1024):
+        self.seconds = seconds
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def get(self, key: Hashable, default=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value):
+        self._entries[key] = (time.monotonic() + self.seconds, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def delete(self, *keys: Hashable):
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+
+def cache_row(instance) -> Dict[str, Any]:
+    """Column values of a loaded ORM instance, for caching across sessions.
+
+    Instances belong to one session, so caches shared between requests
+    hold these dicts and turn them back into instances with attach_cached.
+    """
+    return {attr.key: getattr(instance, attr.key) for attr in inspect(type(instance)).column_attrs}
+
+
+def attach_cached(db: Session, model, cached: Dict[str, Any]):
+    """Turn a cache_row dict back into an instance of db, without a SELECT.
+
+    An instance the session already holds is at least as fresh as the
+    cache, so it is returned as is rather than overwritten by a merge.
+    """
+    mapper = inspect(model)
+    identity = tuple(cached[mapper.get_property_by_column(column).key] for column in mapper.primary_key)
+    existing = db.identity_map.get(mapper.identity_key_from_primary_key(identity))
+    if existing is not None:
+        return existing
+    instance = model(**copy.deepcopy(cached))
+    make_transient_to_detached(instance)
+    return db.merge(instance, load=False)
+
+
+_PENDING_INVALIDATIONS = "cache_invalidations"
+
+
+def invalidate_on_commit(db: Session, invalidate: Callable[..., None], *keys: Hashable):
+    """Call invalidate(*keys) once db's transaction ends, e.g. with a
+    TTLCache's delete.
+
+    Invalidating at flush time would let a concurrent reader cache the old
+    row again before the change was committed. Keys queued for the same
+    invalidate function in one transaction are passed in a single call.
+    """
+    db.info.setdefault(_PENDING_INVALIDATIONS, {}).setdefault(invalidate, set()).update(keys)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _apply_pending_invalidations(session: Session):
+    for invalidate, keys in session.info.pop(_PENDING_INVALIDATIONS, {}).items():
+        invalidate(*keys)
@@ -12,6 +12,10 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "sqlite:///./water_bottles.db"
+    # Connection pool per engine; pool_recycle must stay below the server's idle timeout
+    DB_POOL_SIZE: int = 25
+    DB_MAX_OVERFLOW: int = 25
+    DB_POOL_RECYCLE_SECONDS: int = 1800
     
     # JWT Auth
     SECRET_KEY: str = "default_secret_key" # Should be overridden by env var
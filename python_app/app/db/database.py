@@ -1,9 +1,14 @@
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from pathlib import Path
 
+from app.core.config import settings
+
 # Build the path to the database file
 db_path = Path(__file__).parent.parent / "data" / "water_app.db"
 SQLALCHEMY_DATABASE_URL = f"sqlite:///{db_path}"
@@ -11,14 +16,39 @@ SQLALCHEMY_DATABASE_URL = f"sqlite:///{db_path}"
 # Ensure the data directory exists
 os.makedirs(db_path.parent, exist_ok=True)
 
+def pool_options(database_url: str) -> dict:
+    """Connection pool arguments for an engine on database_url.
+
+    SQLite has no server to size a pool for or lose connections to, so it
+    keeps SQLAlchemy's defaults.
+    """
+    if make_url(database_url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_pre_ping": True,  # Replace connections dropped by a database restart
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    }
+
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, 
-    connect_args={"check_same_thread": False} # Needed for SQLite
+    connect_args={"check_same_thread": False}, # Needed for SQLite
+    **pool_options(SQLALCHEMY_DATABASE_URL)
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+def insert_ignoring_conflicts(db: Session, model, **conflict_target):
+    """INSERT that skips rows which would violate a unique constraint.
+
+    conflict_target (index_elements, index_where) names a specific unique
+    index, which is required when that index is partial.
+    """
+    insert_for_dialect = sqlite_insert if db.bind.dialect.name == "sqlite" else pg_insert
+    return insert_for_dialect(model).on_conflict_do_nothing(**conflict_target)
+
 # Dependency to get a DB session
 def get_db():
     db = SessionLocal()
@@ -1,7 +1,8 @@
 from sqlalchemy import (
     Column, Integer, String, DateTime, Boolean, 
-    ForeignKey, Table, Float, Text, JSON, DDL, event, UniqueConstraint, Index
+    ForeignKey, Table, Float, Text, JSON, DDL, event, UniqueConstraint, Index, text
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy.sql import func
 from app.db.database import Base
@@ -25,6 +26,9 @@ class User(Base):
     is_superuser: Mapped[bool] = mapped_column(Boolean, default=False)
     role: Mapped[str] = mapped_column(String, default="user")
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # Maintained by SocialService on follow/unfollow so counts are a row read
+    followers_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    following_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
     
     profile: Mapped["UserProfile"] = relationship("UserProfile", back_populates="user", uselist=False, cascade="all, delete-orphan")
     reviews: Mapped[list["Review"]] = relationship("Review", back_populates="user")
@@ -379,16 +383,51 @@ class UserFollow(Base):
     following_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE"), primary_key=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # The primary key serves "who does X follow"; this serves "who follows X"
+        Index('ix_user_follows_following_follower', 'following_id', 'follower_id'),
+    )
+
+class FriendPair(Base):
+    # Mutual follows, stored once per direction so a user's friends are a
+    # primary-key range lookup. Kept in sync by SocialService on follow/unfollow.
+    __tablename__ = "friend_pairs"
+    user_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE"), primary_key=True)
+    friend_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE"), primary_key=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 class Activity(Base):
     __tablename__ = 'activities'
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE"), nullable=False)
     activity_type = Column(String, nullable=False)
-    data = Column(JSON)
+    # The full activity payload, so the feed renders from this row alone
+    data = Column(JSON().with_variant(JSONB, 'postgresql'), nullable=False, default=dict, server_default='{}')
     created_at = Column(DateTime, default=datetime.utcnow)
     
     user = relationship("User", back_populates="activities")
 
+    __table_args__ = (
+        # Per-author feeds read newest first
+        Index('ix_activity_user_created', 'user_id', created_at.desc()),
+    )
+
+class TimelineEntry(Base):
+    # Activities fanned out to each reader at write time, so a feed is one
+    # index range scan per reader. author_id is copied from the activity so
+    # an unfollow can drop that author's entries without a join.
+    __tablename__ = 'timeline_entries'
+    user_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE"), primary_key=True)
+    activity_id = Column(Integer, ForeignKey('activities.id', ondelete="CASCADE"), primary_key=True)
+    author_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE"), nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+    activity = relationship("Activity")
+
+    __table_args__ = (
+        Index('ix_timeline_entries_user_created', 'user_id', 'created_at'),
+    )
+
 class Achievement(Base):
     __tablename__ = 'achievements'
     id = Column(String, primary_key=True, index=True)
@@ -444,6 +483,12 @@ class FriendRequest(Base):
     requester = relationship("User", foreign_keys=[requester_id])
     addressee = relationship("User", foreign_keys=[addressee_id])
 
+    __table_args__ = (
+        # One pending request per pair; answered requests don't count
+        Index('uq_friend_requests_pending', 'requester_id', 'addressee_id', unique=True,
+              postgresql_where=text("status = 'pending'"), sqlite_where=text("status = 'pending'")),
+    )
+
 class Device(Base):
     __tablename__ = 'devices'
     id = Column(Integer, primary_key=True, index=True)
@@ -2,20 +2,20 @@ import time
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import ASGIApp
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 
 from app.services.security_system_service import SecuritySystemService
 from app.schemas.security_system import AuditLogCreate
 from app.models.security_system import EventType, ActionStatus
 from app.core.config import settings
+from app.db.database import pool_options
 
 # This is a simplified way to get a DB session in middleware.
 # In a complex app, you might use a context variable or another pattern.
-async_engine = create_async_engine(settings.ASYNC_DATABASE_URL, echo=True)
-AsyncSessionLocal = sessionmaker(
-    bind=async_engine, class_=AsyncSession, expire_on_commit=False
-)
+async_engine = create_async_engine(settings.ASYNC_DATABASE_URL, **pool_options(settings.ASYNC_DATABASE_URL))
+# Services return ORM objects straight after committing them and don't refresh
+# them, so objects must keep their loaded state across commits.
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
 
 class AuditMiddleware(BaseHTTPMiddleware):
     def __init__(self, app: ASGIApp):
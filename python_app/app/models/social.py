@@ -19,6 +19,15 @@ class FriendRequest(BaseModel):
     class Config:
         from_attributes = True
 
+class PendingFriendRequest(BaseModel):
+    """A request waiting on the current user, built from a projected row."""
+    id: int
+    requester_id: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
 class FriendRequestCreate(BaseModel):
     addressee_id: int
 
@@ -66,4 +75,5 @@ class FeedItem(BaseModel):
     created_at: datetime
     
 class SocialFeed(BaseModel):
-    items: List[FeedItem] 
\ No newline at end of file
+    items: List[FeedItem]
+    next_cursor: Optional[str] = None  # Pass as cursor for the next page; None on the last page
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Enum as SQLEnum, JSON, Float, BigInteger
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Enum as SQLEnum, JSON, Float, BigInteger, Index, DDL, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime, timedelta
@@ -131,16 +131,60 @@ class UserProfile(Base, TimestampMixin, UUIDMixin):
     
     # Relationships
     user = relationship("User", back_populates="profile")
-    preferences = relationship("UserPreferences", back_populates="profile", uselist=False)
-    privacy_settings = relationship("UserPrivacySettings", back_populates="profile", uselist=False)
-    customizations = relationship("UserCustomizations", back_populates="profile", uselist=False)
-    achievements = relationship("UserAchievement", back_populates="profile")
-    social_connections = relationship("UserSocialConnection", back_populates="profile")
+    # Child rows are removed by ON DELETE CASCADE; passive_deletes keeps the
+    # ORM from loading them just to delete them
+    preferences = relationship("UserPreferences", back_populates="profile", uselist=False,
+                               cascade="all, delete-orphan", passive_deletes=True)
+    privacy_settings = relationship("UserPrivacySettings", back_populates="profile", uselist=False,
+                                    cascade="all, delete-orphan", passive_deletes=True)
+    customizations = relationship("UserCustomizations", back_populates="profile", uselist=False,
+                                  cascade="all, delete-orphan", passive_deletes=True)
+    achievements = relationship("UserAchievement", back_populates="profile",
+                                cascade="all, delete-orphan", passive_deletes=True)
+    social_connections = relationship("UserSocialConnection", back_populates="profile",
+                                      cascade="all, delete-orphan", passive_deletes=True)
+
+# search_profiles filters on visibility and sorts by this exact key, so the
+# rows come out of the index already in order
+Index(
+    'ix_user_profiles_search_order',
+    UserProfile.profile_visibility,
+    UserProfile.profile_completion_percentage.desc(),
+    UserProfile.is_verified.desc(),
+    UserProfile.updated_at.desc()
+)
+# get_profile_suggestions matches on activity level and sorts by the same key
+# as search, so it reads candidates in order and stops at its limit
+Index(
+    'ix_user_profiles_suggestion_order',
+    UserProfile.activity_level,
+    UserProfile.profile_completion_percentage.desc(),
+    UserProfile.is_verified.desc(),
+    UserProfile.updated_at.desc()
+)
+# Verified profiles are a small minority that verified_only searches and the
+# verification stats look up on their own
+Index(
+    'ix_user_profiles_verified',
+    UserProfile.is_verified,
+    postgresql_where=UserProfile.is_verified == True,
+    sqlite_where=UserProfile.is_verified == True
+)
+
+# GIN index over the profile search document on PostgreSQL. search_profiles
+# builds the exact same to_tsvector expression so the planner can use it.
+create_profile_search_index = DDL("""
+CREATE INDEX IF NOT EXISTS ix_user_profiles_search_tsv ON user_profiles USING gin (
+    to_tsvector('simple', coalesce(display_name, '') || ' ' || coalesce(bio, '') || ' ' || coalesce(location, ''))
+);
+""")
+
+event.listen(UserProfile.__table__, 'after_create', create_profile_search_index.execute_if(dialect='postgresql'))
 
 class UserPreferences(Base, TimestampMixin, UUIDMixin):
     __tablename__ = "user_preferences"
     
-    profile_id = Column(String(36), ForeignKey("user_profiles.id"), nullable=False, unique=True)
+    profile_id = Column(String(36), ForeignKey("user_profiles.id", ondelete="CASCADE"), nullable=False, unique=True)
     
     # Localization preferences
     language = Column(SQLEnum(LanguageCode), default=LanguageCode.EN)
@@ -203,7 +247,7 @@ class UserPreferences(Base, TimestampMixin, UUIDMixin):
 class UserPrivacySettings(Base, TimestampMixin, UUIDMixin):
     __tablename__ = "user_privacy_settings"
     
-    profile_id = Column(String(36), ForeignKey("user_profiles.id"), nullable=False, unique=True)
+    profile_id = Column(String(36), ForeignKey("user_profiles.id", ondelete="CASCADE"), nullable=False, unique=True)
     
     # Overall privacy level
     privacy_level = Column(SQLEnum(PrivacyLevel), default=PrivacyLevel.BALANCED)
@@ -256,10 +300,15 @@ class UserPrivacySettings(Base, TimestampMixin, UUIDMixin):
     # Relationships
     profile = relationship("UserProfile", back_populates="privacy_settings")
 
+    __table_args__ = (
+        # Profile search joins on searchable profiles only
+        Index('ix_user_privacy_settings_searchable_profile', 'profile_searchable', 'profile_id'),
+    )
+
 class UserCustomizations(Base, TimestampMixin, UUIDMixin):
     __tablename__ = "user_customizations"
     
-    profile_id = Column(String(36), ForeignKey("user_profiles.id"), nullable=False, unique=True)
+    profile_id = Column(String(36), ForeignKey("user_profiles.id", ondelete="CASCADE"), nullable=False, unique=True)
     
     # Theme customizations
     primary_color = Column(String(7))  # Hex color
@@ -306,7 +355,7 @@ class UserCustomizations(Base, TimestampMixin, UUIDMixin):
 class UserAchievement(Base, TimestampMixin, UUIDMixin):
     __tablename__ = "user_achievements"
     
-    profile_id = Column(String(36), ForeignKey("user_profiles.id"), nullable=False)
+    profile_id = Column(String(36), ForeignKey("user_profiles.id", ondelete="CASCADE"), nullable=False)
     achievement_id = Column(String(36), nullable=False)
     
     # Achievement details
@@ -336,7 +385,7 @@ class UserAchievement(Base, TimestampMixin, UUIDMixin):
 class UserSocialConnection(Base, TimestampMixin, UUIDMixin):
     __tablename__ = "user_social_connections"
     
-    profile_id = Column(String(36), ForeignKey("user_profiles.id"), nullable=False)
+    profile_id = Column(String(36), ForeignKey("user_profiles.id", ondelete="CASCADE"), nullable=False)
     
     # Connection details
     platform = Column(String(50), nullable=False)  # facebook, twitter, instagram, etc.
@@ -365,7 +414,7 @@ class UserSocialConnection(Base, TimestampMixin, UUIDMixin):
 class UserHealthProfile(Base, TimestampMixin, UUIDMixin):
     __tablename__ = "user_health_profiles"
     
-    profile_id = Column(String(36), ForeignKey("user_profiles.id"), nullable=False, unique=True)
+    profile_id = Column(String(36), ForeignKey("user_profiles.id", ondelete="CASCADE"), nullable=False, unique=True)
     
     # Basic health metrics
     resting_heart_rate = Column(Integer)
@@ -418,7 +467,7 @@ class UserHealthProfile(Base, TimestampMixin, UUIDMixin):
 class UserActivityProfile(Base, TimestampMixin, UUIDMixin):
     __tablename__ = "user_activity_profiles"
     
-    profile_id = Column(String(36), ForeignKey("user_profiles.id"), nullable=False, unique=True)
+    profile_id = Column(String(36), ForeignKey("user_profiles.id", ondelete="CASCADE"), nullable=False, unique=True)
     
     # Activity patterns
     typical_wake_time = Column(String(5))  # HH:MM
@@ -528,6 +577,9 @@ class UserCustomizationsUpdate(BaseModel):
     favorite_drink_types: Optional[List[str]] = None
     quick_actions: Optional[List[str]] = None
 
+class AvatarUploadComplete(BaseModel):
+    s3_key: str = Field(..., max_length=500)
+
 class UserProfileResponse(BaseModel):
     id: str
     user_id: str
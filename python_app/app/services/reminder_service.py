@@ -11,31 +11,54 @@ class ReminderService:
     def get_reminders_by_user(self, db: Session, user_id: int) -> List[Reminder]:
         return db.query(Reminder).filter(Reminder.user_id == user_id).all()
 
-    def create_reminder(self, db: Session, reminder_data: ReminderCreate, user_id: int) -> Reminder:
-        db_reminder = Reminder(**reminder_data.model_dump(), user_id=user_id)
+    def create_reminder(self, db: Session, reminder_data: ReminderCreate, user_id: int, commit: bool = True) -> Reminder:
+        """Create a reminder and schedule it.
+
+        With commit=False the reminder is only flushed (so it has an ID to
+        schedule under) and the caller is responsible for committing.
+        """
+        # ReminderCreate has no aliases or computed fields, so its field dict can be used as-is
+        db_reminder = Reminder(user_id=user_id, **reminder_data.__dict__)
         db.add(db_reminder)
-        db.commit()
-        db.refresh(db_reminder)
+        if commit:
+            db.commit()
+            db.refresh(db_reminder)
+        else:
+            db.flush()
         scheduler_manager.add_job(db_reminder)
         return db_reminder
 
-    def update_reminder(self, db: Session, reminder_id: int, reminder_data: ReminderUpdate, user_id: int) -> Optional[Reminder]:
+    def create_many(self, db: Session, items: List[ReminderCreate], user_id: int) -> List[Reminder]:
+        """Create several reminders in a single transaction, then schedule them."""
+        db_reminders = [Reminder(user_id=user_id, **item.__dict__) for item in items]
+        db.add_all(db_reminders)
+        db.commit()
+        for db_reminder in db_reminders:
+            db.refresh(db_reminder)
+            scheduler_manager.add_job(db_reminder)
+        return db_reminders
+
+    def update_reminder(self, db: Session, reminder_id: int, reminder_data: ReminderUpdate, user_id: int, commit: bool = True) -> Optional[Reminder]:
         db_reminder = self.get_reminder(db, reminder_id, user_id)
         if not db_reminder:
             return None
         update_data = reminder_data.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_reminder, key, value)
-        db.commit()
-        db.refresh(db_reminder)
+        if commit:
+            db.commit()
+            db.refresh(db_reminder)
+        else:
+            db.flush()
         scheduler_manager.update_job(db_reminder)
         return db_reminder
 
-    def delete_reminder(self, db: Session, reminder_id: int, user_id: int) -> bool:
+    def delete_reminder(self, db: Session, reminder_id: int, user_id: int, commit: bool = True) -> bool:
         db_reminder = self.get_reminder(db, reminder_id, user_id)
         if db_reminder:
             scheduler_manager.remove_job(reminder_id)
             db.delete(db_reminder)
-            db.commit()
+            if commit:
+                db.commit()
             return True
-        return False 
\ No newline at end of file
+        return False
@@ -1,10 +1,18 @@
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Tuple, Callable, Iterable, Set
+import asyncio
 import json
+import aiofiles
 import os
-from datetime import datetime, timedelta
+import time
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 import logging
+from array import array
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
+from heapq import nlargest, nsmallest
+from dataclasses import dataclass, field, fields
+from operator import attrgetter
 
 from app.models.review import (
     Review, ReviewCreate, ReviewUpdate, ReviewModeration,
@@ -13,9 +21,220 @@ from app.models.review import (
 )
 from app.services.user_service import user_service
 from app.services.data_service import DataService
+from app.core.cache import async_timed_lru_cache
 
 logger = logging.getLogger(__name__)
 
+RECENT_REVIEW_WINDOW = timedelta(days=30)
+FLUSH_COALESCE_DELAY = 0.01  # Seconds to gather concurrent mutations into one write
+METADATA_CACHE_SECONDS = 60
+METADATA_CACHE_SIZE = 2048
+DETAILED_RATING_FIELDS = ('taste_rating', 'health_rating', 'value_rating', 'packaging_rating')
+# Fields every review has; a null in an update leaves them unchanged
+REQUIRED_REVIEW_FIELDS = frozenset({'rating', 'title', 'comment', 'review_type'})
+
+
+def _to_epoch(value: Any) -> float:
+    """Convert a stored ISO timestamp (or naive UTC datetime) to epoch seconds."""
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+@dataclass(slots=True)
+class ReviewRow:
+    """In-memory review record; slots avoid a per-review ``__dict__``."""
+    id: int
+    user_id: int
+    water_id: int
+    rating: float
+    title: str
+    comment: str
+    review_type: ReviewType
+    status: ReviewStatus
+    taste_rating: Optional[float] = None
+    health_rating: Optional[float] = None
+    value_rating: Optional[float] = None
+    packaging_rating: Optional[float] = None
+    is_verified_purchase: bool = False
+    helpful_votes: int = 0
+    total_votes: int = 0
+    flagged_count: int = 0
+    created_at: str = ""
+    updated_at: str = ""
+    approved_at: Optional[str] = None
+    moderator_notes: Optional[str] = None
+    created_ts: float = 0.0  # Epoch form of created_at, derived and never persisted
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ReviewRow":
+        """Build a row from a stored review, ignoring derived metadata keys."""
+        row = cls(**{name: data[name] for name in _ROW_FIELDS if name in data})
+        row.review_type = ReviewType(row.review_type)
+        row.status = ReviewStatus(row.status)
+        row.created_ts = _to_epoch(row.created_at)
+        return row
+
+    def to_dict(self) -> Dict:
+        """Return the persisted fields of the row as a plain dict."""
+        return {name: getattr(self, name) for name in _PERSISTED_FIELDS}
+
+
+_ROW_FIELDS = tuple(f.name for f in fields(ReviewRow))
+_PERSISTED_FIELDS = tuple(name for name in _ROW_FIELDS if name != 'created_ts')
+
+_TIMESTAMP_FIELDS = ('created_at', 'updated_at', 'approved_at')
+
+_BY_CREATED_AT = attrgetter('created_at')
+_BY_FLAGGED_COUNT = attrgetter('flagged_count')
+_WATER_REVIEW_SORT_KEYS = {
+    "helpful": attrgetter('helpful_votes'),
+    "rating": attrgetter('rating'),
+    "created_at": _BY_CREATED_AT,
+}
+
+
+class TimestampIndex:
+    """Review creation timestamps kept sorted in unboxed parallel columns.
+    
+    Each entry costs 16 bytes of array storage instead of a tuple holding
+    a boxed float and int.
+    """
+    __slots__ = ('timestamps', 'review_ids')
+
+    def __init__(self, entries: Iterable[Tuple[float, int]] = ()):
+        self.timestamps = array('d')
+        self.review_ids = array('q')
+        for created_ts, review_id in sorted(entries):
+            self.timestamps.append(created_ts)
+            self.review_ids.append(review_id)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def insert(self, review: ReviewRow):
+        """Insert a review, keeping the columns sorted by timestamp."""
+        position = bisect_right(self.timestamps, review.created_ts)
+        self.timestamps.insert(position, review.created_ts)
+        self.review_ids.insert(position, review.id)
+
+    def remove(self, review: ReviewRow):
+        """Remove a review previously inserted into the index."""
+        timestamps = self.timestamps
+        position = bisect_left(timestamps, review.created_ts)
+        while position < len(timestamps) and timestamps[position] == review.created_ts:
+            if self.review_ids[position] == review.id:
+                del timestamps[position]
+                del self.review_ids[position]
+                return
+            position += 1
+
+    def count_recent(self, now_ts: float) -> int:
+        """Count entries created within the recent review window."""
+        cutoff = now_ts - RECENT_REVIEW_WINDOW.total_seconds()
+        return len(self.timestamps) - bisect_right(self.timestamps, cutoff)
+
+
+def _review_model(review_dict: Dict) -> Review:
+    """Build a Review from trusted cached data without re-running validation.
+    
+    Only the stored ISO timestamps need converting to the model's types.
+    """
+    for name in _TIMESTAMP_FIELDS:
+        value = review_dict.get(name)
+        if isinstance(value, str):
+            review_dict[name] = datetime.fromisoformat(value)
+    return Review.model_construct(**review_dict)
+
+
+def _sorted_page(
+    items: List[ReviewRow], key: Callable, reverse: bool, skip: int, limit: int
+) -> List[ReviewRow]:
+    """Return items[skip:skip + limit] of the sorted list without always sorting it all.
+    
+    Shallow pages of long lists use a heap-based partial selection, which
+    is O(N log K) instead of O(N log N) and yields the same stable order.
+    """
+    page_end = skip + limit
+    if page_end * 4 < len(items):
+        select = nlargest if reverse else nsmallest
+        return select(page_end, items, key=key)[skip:]
+    return sorted(items, key=key, reverse=reverse)[skip:page_end]
+
+
+@dataclass(slots=True)
+class StatsAccumulator:
+    """Running aggregates over the approved reviews of a single water bottle."""
+    count: int = 0
+    sum_rating: float = 0.0
+    rating_hist: List[int] = field(default_factory=lambda: [0] * 6)
+    detailed_sums: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(DETAILED_RATING_FIELDS, 0.0))
+    detailed_counts: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(DETAILED_RATING_FIELDS, 0))
+    verified_count: int = 0
+    created_index: TimestampIndex = field(default_factory=TimestampIndex)
+
+    def add(self, review: ReviewRow):
+        """Fold an approved review into the running aggregates."""
+        self._apply(review, 1)
+        self.created_index.insert(review)
+
+    def remove(self, review: ReviewRow):
+        """Withdraw a previously added review from the running aggregates."""
+        self._apply(review, -1)
+        self.created_index.remove(review)
+
+    def recent_count(self, now_ts: float) -> int:
+        """Count approved reviews created within the recent review window."""
+        return self.created_index.count_recent(now_ts)
+
+    def _apply(self, review: ReviewRow, sign: int):
+        rating = review.rating
+        self.count += sign
+        self.sum_rating += sign * rating
+        star_rating = int(round(rating))
+        if 1 <= star_rating <= 5:
+            self.rating_hist[star_rating] += sign
+        for rating_field in DETAILED_RATING_FIELDS:
+            value = getattr(review, rating_field)
+            if value:
+                self.detailed_sums[rating_field] += sign * value
+                self.detailed_counts[rating_field] += sign
+        if review.is_verified_purchase:
+            self.verified_count += sign
+
+    def detailed_average(self, rating_field: str) -> Optional[float]:
+        count = self.detailed_counts[rating_field]
+        return round(self.detailed_sums[rating_field] / count, 2) if count else None
+
+
+@dataclass(slots=True)
+class UserReviewTotals:
+    """Running aggregates over every review written by a single user."""
+    count: int = 0
+    sum_rating: float = 0.0
+    helpful_votes: int = 0
+    verified_count: int = 0
+    created_index: TimestampIndex = field(default_factory=TimestampIndex)
+
+    def add(self, review: ReviewRow):
+        """Fold a new review into the running aggregates."""
+        self._apply(review, 1)
+        self.created_index.insert(review)
+
+    def remove(self, review: ReviewRow):
+        """Withdraw a deleted review from the running aggregates."""
+        self._apply(review, -1)
+        self.created_index.remove(review)
+
+    def _apply(self, review: ReviewRow, sign: int):
+        self.count += sign
+        self.sum_rating += sign * review.rating
+        self.helpful_votes += sign * review.helpful_votes
+        if review.is_verified_purchase:
+            self.verified_count += sign
+
 
 class ReviewService:
     """Service for review management operations."""
@@ -25,13 +244,34 @@ class ReviewService:
         self.votes_file = Path(__file__).parent.parent / "data" / "review_votes.json"
         self.flags_file = Path(__file__).parent.parent / "data" / "review_flags.json"
         self._ensure_data_files()
-        self._reviews_cache = None
+        self._reviews_by_id: Optional[Dict[int, ReviewRow]] = None
         self._votes_cache = None
         self._flags_cache = None
         self._next_review_id = 1
         self._next_vote_id = 1
         self._next_flag_id = 1
+        self._stats_by_water: Dict[int, StatsAccumulator] = defaultdict(StatsAccumulator)
+        self._totals_by_user: Dict[int, UserReviewTotals] = defaultdict(UserReviewTotals)
+        self._ids_by_water: Dict[int, Set[int]] = defaultdict(set)
+        self._ids_by_user: Dict[int, Set[int]] = defaultdict(set)
+        self._ids_by_status: Dict[str, Set[int]] = defaultdict(set)
+        self._user_water_pairs: Set[Tuple[int, int]] = set()
+        self._vote_pairs: Set[Tuple[int, int]] = set()
+        self._flag_pairs: Set[Tuple[int, int]] = set()
+        self._pending_flushes: Dict[str, asyncio.Future] = {}
+        self._flush_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._flush_tasks = set()
+        self._load_lock = asyncio.Lock()
         self.data_service = DataService()
+        # The same users and waters are looked up for review after review
+        self._get_user = async_timed_lru_cache(METADATA_CACHE_SECONDS, METADATA_CACHE_SIZE)(
+            user_service.get_user_by_id
+        )
+        # Usernames and verification status must not outlive a committed change
+        user_service.add_change_listener(self._get_user.cache_invalidate)
+        self._get_water = async_timed_lru_cache(METADATA_CACHE_SECONDS, METADATA_CACHE_SIZE)(
+            self.data_service.get_water_by_id
+        )
     
     def _ensure_data_files(self):
         """Ensure review data files exist."""
@@ -43,182 +283,331 @@ class ReviewService:
                 with open(file_path, 'w') as f:
                     json.dump([], f)
     
-    async def _load_reviews(self) -> List[Dict]:
-        """Load reviews from file."""
-        if self._reviews_cache is None:
-            try:
-                with open(self.reviews_file, 'r') as f:
-                    self._reviews_cache = json.load(f)
+    async def _load_reviews(self) -> Dict[int, ReviewRow]:
+        """Load reviews from file, keyed by review ID."""
+        if self._reviews_by_id is None:
+            # Concurrent first callers must not each load and replace the cache
+            async with self._load_lock:
+                if self._reviews_by_id is None:
+                    try:
+                        async with aiofiles.open(self.reviews_file, 'r') as f:
+                            reviews = json.loads(await f.read())
+                        
+                        self._reviews_by_id = {review['id']: ReviewRow.from_dict(review) for review in reviews}
+                        
+                        # Update next review ID
+                        if self._reviews_by_id:
+                            self._next_review_id = max(self._reviews_by_id) + 1
+                    except Exception as e:
+                        logger.error(f"Error loading reviews: {e}")
+                        self._reviews_by_id = {}
                     
-                # Update next review ID
-                if self._reviews_cache:
-                    self._next_review_id = max(review['id'] for review in self._reviews_cache) + 1
-            except Exception as e:
-                logger.error(f"Error loading reviews: {e}")
-                self._reviews_cache = []
+                    self._rebuild_indexes(self._reviews_by_id.values())
         
-        return self._reviews_cache
+        return self._reviews_by_id
+    
+    def _rebuild_indexes(self, reviews: Iterable[ReviewRow]):
+        """Rebuild the lookup indexes and the per-water and per-user accumulators."""
+        self._stats_by_water = defaultdict(StatsAccumulator)
+        self._totals_by_user = defaultdict(UserReviewTotals)
+        self._ids_by_water = defaultdict(set)
+        self._ids_by_user = defaultdict(set)
+        self._ids_by_status = defaultdict(set)
+        self._user_water_pairs = set()
+        created_by_user = defaultdict(list)
+        for review in reviews:
+            self._user_water_pairs.add((review.user_id, review.water_id))
+            self._ids_by_water[review.water_id].add(review.id)
+            self._ids_by_user[review.user_id].add(review.id)
+            self._track_status(review)
+            self._totals_by_user[review.user_id]._apply(review, 1)
+            created_by_user[review.user_id].append((review.created_ts, review.id))
+        for user_id, entries in created_by_user.items():
+            self._totals_by_user[user_id].created_index = TimestampIndex(entries)
     
-    async def _save_reviews(self, reviews: List[Dict]):
+    def _index_review(self, review: ReviewRow):
+        """Add a new review to every index."""
+        self._user_water_pairs.add((review.user_id, review.water_id))
+        self._ids_by_water[review.water_id].add(review.id)
+        self._ids_by_user[review.user_id].add(review.id)
+        self._totals_by_user[review.user_id].add(review)
+        self._track_status(review)
+    
+    def _unindex_review(self, review: ReviewRow):
+        """Remove a deleted review from every index."""
+        self._user_water_pairs.discard((review.user_id, review.water_id))
+        self._ids_by_water[review.water_id].discard(review.id)
+        self._ids_by_user[review.user_id].discard(review.id)
+        self._totals_by_user[review.user_id].remove(review)
+        self._untrack_status(review)
+    
+    def _track_status(self, review: ReviewRow):
+        """Add a review to its status index and, once approved, its water's stats."""
+        self._ids_by_status[review.status].add(review.id)
+        if review.status == ReviewStatus.APPROVED:
+            self._stats_by_water[review.water_id].add(review)
+    
+    def _untrack_status(self, review: ReviewRow):
+        """Remove a review from its status index and, if approved, its water's stats.
+        
+        Must be called before a review's status or rating fields change.
+        """
+        self._ids_by_status[review.status].discard(review.id)
+        if review.status == ReviewStatus.APPROVED:
+            self._stats_by_water[review.water_id].remove(review)
+    
+    def _reviews_for(self, index: Dict[Any, Set[int]], key: Any) -> List[ReviewRow]:
+        """Resolve the review IDs stored under an index key to rows."""
+        ids = index.get(key)
+        if not ids:
+            return []
+        reviews = self._reviews_by_id
+        return [reviews[review_id] for review_id in ids]
+    
+    async def _flush_coalesced(self, name: str, file_path: Path, serialize: Callable[[], str]):
+        """Wait until the current in-memory state of a data file is on disk.
+        
+        Mutations arriving within FLUSH_COALESCE_DELAY of each other share a
+        single write of the latest state instead of one write each.
+        """
+        waiter = self._pending_flushes.get(name)
+        if waiter is None:
+            waiter = asyncio.get_running_loop().create_future()
+            self._pending_flushes[name] = waiter
+            task = asyncio.create_task(self._run_flush(name, file_path, serialize))
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+        await asyncio.shield(waiter)
+    
+    async def _run_flush(self, name: str, file_path: Path, serialize: Callable[[], str]):
+        """Write one batch of pending mutations and wake everyone waiting on it."""
+        await asyncio.sleep(FLUSH_COALESCE_DELAY)
+        async with self._flush_locks[name]:
+            # Later mutations start a new batch while this one is being written
+            waiter = self._pending_flushes.pop(name)
+            try:
+                payload = serialize()
+                async with aiofiles.open(file_path, 'w') as f:
+                    await f.write(payload)
+            except Exception as e:
+                logger.error(f"Error saving {name}: {e}")
+                waiter.set_exception(e)
+            else:
+                waiter.set_result(None)
+    
+    def _serialize_reviews(self) -> str:
+        """Encode cached reviews for disk."""
+        return json.dumps(
+            [review.to_dict() for review in self._reviews_by_id.values()],
+            indent=2, default=str
+        )
+    
+    async def _save_reviews(self):
         """Save reviews to file."""
-        try:
-            with open(self.reviews_file, 'w') as f:
-                json.dump(reviews, f, indent=2, default=str)
-            self._reviews_cache = reviews
-        except Exception as e:
-            logger.error(f"Error saving reviews: {e}")
-            raise
+        await self._flush_coalesced('reviews', self.reviews_file, self._serialize_reviews)
     
     async def _load_votes(self) -> List[Dict]:
         """Load review votes from file."""
         if self._votes_cache is None:
-            try:
-                with open(self.votes_file, 'r') as f:
-                    self._votes_cache = json.load(f)
+            # Concurrent first callers must not each load and replace the cache
+            async with self._load_lock:
+                if self._votes_cache is None:
+                    try:
+                        async with aiofiles.open(self.votes_file, 'r') as f:
+                            self._votes_cache = json.loads(await f.read())
+                        
+                        # Update next vote ID
+                        if self._votes_cache:
+                            self._next_vote_id = max(vote['id'] for vote in self._votes_cache) + 1
+                    except Exception as e:
+                        logger.error(f"Error loading votes: {e}")
+                        self._votes_cache = []
                     
-                # Update next vote ID
-                if self._votes_cache:
-                    self._next_vote_id = max(vote['id'] for vote in self._votes_cache) + 1
-            except Exception as e:
-                logger.error(f"Error loading votes: {e}")
-                self._votes_cache = []
+                    self._vote_pairs = {(vote['user_id'], vote['review_id']) for vote in self._votes_cache}
         
         return self._votes_cache
     
     async def _save_votes(self, votes: List[Dict]):
         """Save votes to file."""
-        try:
-            with open(self.votes_file, 'w') as f:
-                json.dump(votes, f, indent=2, default=str)
-            self._votes_cache = votes
-        except Exception as e:
-            logger.error(f"Error saving votes: {e}")
-            raise
+        self._votes_cache = votes
+        await self._flush_coalesced(
+            'votes', self.votes_file,
+            lambda: json.dumps(self._votes_cache, indent=2, default=str)
+        )
     
     async def _load_flags(self) -> List[Dict]:
         """Load review flags from file."""
         if self._flags_cache is None:
-            try:
-                with open(self.flags_file, 'r') as f:
-                    self._flags_cache = json.load(f)
+            # Concurrent first callers must not each load and replace the cache
+            async with self._load_lock:
+                if self._flags_cache is None:
+                    try:
+                        async with aiofiles.open(self.flags_file, 'r') as f:
+                            self._flags_cache = json.loads(await f.read())
+                        
+                        # Update next flag ID
+                        if self._flags_cache:
+                            self._next_flag_id = max(flag['id'] for flag in self._flags_cache) + 1
+                    except Exception as e:
+                        logger.error(f"Error loading flags: {e}")
+                        self._flags_cache = []
                     
-                # Update next flag ID
-                if self._flags_cache:
-                    self._next_flag_id = max(flag['id'] for flag in self._flags_cache) + 1
-            except Exception as e:
-                logger.error(f"Error loading flags: {e}")
-                self._flags_cache = []
+                    self._flag_pairs = {(flag['user_id'], flag['review_id']) for flag in self._flags_cache}
         
         return self._flags_cache
     
     async def _save_flags(self, flags: List[Dict]):
         """Save flags to file."""
-        try:
-            with open(self.flags_file, 'w') as f:
-                json.dump(flags, f, indent=2, default=str)
-            self._flags_cache = flags
-        except Exception as e:
-            logger.error(f"Error saving flags: {e}")
-            raise
+        self._flags_cache = flags
+        await self._flush_coalesced(
+            'flags', self.flags_file,
+            lambda: json.dumps(self._flags_cache, indent=2, default=str)
+        )
     
-    async def _populate_review_metadata(self, review_dict: Dict) -> Dict:
-        """Populate user and water metadata for a review."""
-        # Get user info
-        user = await user_service.get_user_by_id(review_dict['user_id'])
+    async def _populate_review_metadata(self, review: ReviewRow) -> Dict:
+        """Build a review dict populated with user and water metadata."""
+        review_dict = review.to_dict()
+        
+        # Look up user and water info concurrently
+        user, water_data = await asyncio.gather(
+            self._get_user(review.user_id),
+            self._get_water(review.water_id),
+            return_exceptions=True
+        )
+        if isinstance(user, Exception):
+            raise user
         if user:
             review_dict['username'] = user.username
             review_dict['user_verified'] = user.is_verified
         
-        # Get water info
-        try:
-            water_data = await self.data_service.get_water_by_id(review_dict['water_id'])
-            if water_data:
+        if isinstance(water_data, Exception):
+            logger.warning(f"Could not load water data for review {review.id}: {water_data}")
+        elif water_data:
+            review_dict['water_name'] = water_data.name
+            review_dict['water_brand'] = water_data.brand.name if water_data.brand else None
+        
+        return review_dict
+    
+    async def _populate_review_metadata_batch(self, reviews: List[ReviewRow]) -> List[Dict]:
+        """Build review dicts populated with metadata for a page of reviews.
+        
+        Each distinct user and water is looked up once, and all lookups run
+        concurrently instead of two serial awaits per review.
+        """
+        user_ids = list({review.user_id for review in reviews})
+        water_ids = list({review.water_id for review in reviews})
+        
+        users, waters = await asyncio.gather(
+            asyncio.gather(*(self._get_user(uid) for uid in user_ids)),
+            asyncio.gather(
+                *(self._get_water(wid) for wid in water_ids),
+                return_exceptions=True
+            )
+        )
+        users_by_id = dict(zip(user_ids, users))
+        waters_by_id = dict(zip(water_ids, waters))
+        
+        review_dicts = []
+        for review in reviews:
+            review_dict = review.to_dict()
+            user = users_by_id.get(review.user_id)
+            if user:
+                review_dict['username'] = user.username
+                review_dict['user_verified'] = user.is_verified
+            
+            water_data = waters_by_id.get(review.water_id)
+            if isinstance(water_data, Exception):
+                logger.warning(f"Could not load water data for review {review.id}: {water_data}")
+            elif water_data:
                 review_dict['water_name'] = water_data.name
                 review_dict['water_brand'] = water_data.brand.name if water_data.brand else None
-        except Exception as e:
-            logger.warning(f"Could not load water data for review {review_dict['id']}: {e}")
+            review_dicts.append(review_dict)
         
-        return review_dict
+        return review_dicts
     
     async def create_review(self, user_id: int, review_data: ReviewCreate) -> Review:
         """Create a new review."""
-        reviews = await self._load_reviews()
+        # Start the water lookup so it overlaps with loading and the duplicate check
+        water_task = asyncio.create_task(self._get_water(review_data.water_id))
         
-        # Check if user already reviewed this water
-        existing_review = next(
-            (review for review in reviews 
-             if review['user_id'] == user_id and review['water_id'] == review_data.water_id),
-            None
-        )
-        if existing_review:
-            raise ValueError("You have already reviewed this water bottle")
+        try:
+            reviews = await self._load_reviews()
+            
+            # Check if user already reviewed this water
+            if (user_id, review_data.water_id) in self._user_water_pairs:
+                raise ValueError("You have already reviewed this water bottle")
+        except BaseException:
+            water_task.cancel()
+            raise
         
         # Verify water exists
         try:
-            water_data = await self.data_service.get_water_by_id(review_data.water_id)
+            water_data = await water_task
             if not water_data:
                 raise ValueError("Water bottle not found")
         except Exception:
             raise ValueError("Water bottle not found")
         
         # Create review
-        review_dict = {
-            "id": self._next_review_id,
-            "user_id": user_id,
-            "water_id": review_data.water_id,
-            "rating": review_data.rating,
-            "title": review_data.title,
-            "comment": review_data.comment,
-            "review_type": review_data.review_type,
-            "status": ReviewStatus.PENDING,
-            "taste_rating": review_data.taste_rating,
-            "health_rating": review_data.health_rating,
-            "value_rating": review_data.value_rating,
-            "packaging_rating": review_data.packaging_rating,
-            "is_verified_purchase": review_data.is_verified_purchase,
-            "helpful_votes": 0,
-            "total_votes": 0,
-            "flagged_count": 0,
-            "created_at": datetime.utcnow().isoformat(),
-            "updated_at": datetime.utcnow().isoformat(),
-            "approved_at": None
-        }
-        
-        reviews.append(review_dict)
-        await self._save_reviews(reviews)
+        now = datetime.utcnow()
+        review = ReviewRow(
+            id=self._next_review_id,
+            user_id=user_id,
+            water_id=review_data.water_id,
+            rating=review_data.rating,
+            title=review_data.title,
+            comment=review_data.comment,
+            review_type=review_data.review_type,
+            status=ReviewStatus.PENDING,
+            taste_rating=review_data.taste_rating,
+            health_rating=review_data.health_rating,
+            value_rating=review_data.value_rating,
+            packaging_rating=review_data.packaging_rating,
+            is_verified_purchase=review_data.is_verified_purchase,
+            created_at=now.isoformat(),
+            updated_at=now.isoformat(),
+            created_ts=_to_epoch(now)
+        )
         
+        reviews[review.id] = review
+        self._index_review(review)
         self._next_review_id += 1
+        await self._save_reviews()
         
         # Populate metadata and return
-        review_dict = await self._populate_review_metadata(review_dict)
-        return Review(**review_dict)
+        review_dict = await self._populate_review_metadata(review)
+        return _review_model(review_dict)
     
     async def get_review_by_id(self, review_id: int) -> Optional[Review]:
         """Get review by ID."""
         reviews = await self._load_reviews()
         
-        review_dict = next((review for review in reviews if review['id'] == review_id), None)
-        if not review_dict:
+        review = reviews.get(review_id)
+        if not review:
             return None
         
         # Populate metadata
-        review_dict = await self._populate_review_metadata(review_dict)
-        return Review(**review_dict)
+        review_dict = await self._populate_review_metadata(review)
+        return _review_model(review_dict)
     
     async def update_review(self, user_id: int, review_id: int, review_update: ReviewUpdate) -> Optional[Review]:
         """Update a review (only by the author)."""
         reviews = await self._load_reviews()
         
-        review_index = next((i for i, review in enumerate(reviews) if review['id'] == review_id), None)
-        if review_index is None:
+        review = reviews.get(review_id)
+        if review is None:
             return None
         
         # Check if user owns the review
-        if reviews[review_index]['user_id'] != user_id:
+        if review.user_id != user_id:
             raise ValueError("You can only update your own reviews")
         
-        # Update review
-        update_data = review_update.dict(exclude_unset=True)
+        # Update review. Nulls are dropped before any index is touched, so
+        # they can't leave the running totals half updated
+        update_data = {
+            key: value for key, value in review_update.dict(exclude_unset=True).items()
+            if value is not None or key not in REQUIRED_REVIEW_FIELDS
+        }
         update_data['updated_at'] = datetime.utcnow().isoformat()
         
         # Reset status to pending if content was changed
@@ -227,28 +616,35 @@ class ReviewService:
             update_data['status'] = ReviewStatus.PENDING
             update_data['approved_at'] = None
         
-        reviews[review_index].update(update_data)
-        await self._save_reviews(reviews)
+        totals = self._totals_by_user[review.user_id]
+        self._untrack_status(review)
+        totals.sum_rating -= review.rating
+        for key, value in update_data.items():
+            setattr(review, key, value)
+        totals.sum_rating += review.rating
+        self._track_status(review)
+        await self._save_reviews()
         
         # Populate metadata and return
-        review_dict = await self._populate_review_metadata(reviews[review_index])
-        return Review(**review_dict)
+        review_dict = await self._populate_review_metadata(review)
+        return _review_model(review_dict)
     
     async def delete_review(self, user_id: int, review_id: int, is_admin: bool = False) -> bool:
         """Delete a review (by author or admin)."""
         reviews = await self._load_reviews()
         
-        review_index = next((i for i, review in enumerate(reviews) if review['id'] == review_id), None)
-        if review_index is None:
+        review = reviews.get(review_id)
+        if review is None:
             return False
         
         # Check permissions
-        if not is_admin and reviews[review_index]['user_id'] != user_id:
+        if not is_admin and review.user_id != user_id:
             raise ValueError("You can only delete your own reviews")
         
         # Remove review
-        reviews.pop(review_index)
-        await self._save_reviews(reviews)
+        self._unindex_review(review)
+        del reviews[review_id]
+        await self._save_reviews()
         
         return True
     
@@ -256,26 +652,28 @@ class ReviewService:
         """Moderate a review (admin/moderator only)."""
         reviews = await self._load_reviews()
         
-        review_index = next((i for i, review in enumerate(reviews) if review['id'] == review_id), None)
-        if review_index is None:
+        review = reviews.get(review_id)
+        if review is None:
             return None
         
         # Update review status
-        reviews[review_index]['status'] = moderation.status
-        reviews[review_index]['updated_at'] = datetime.utcnow().isoformat()
+        self._untrack_status(review)
+        review.status = moderation.status
+        review.updated_at = datetime.utcnow().isoformat()
         
         if moderation.status == ReviewStatus.APPROVED:
-            reviews[review_index]['approved_at'] = datetime.utcnow().isoformat()
+            review.approved_at = datetime.utcnow().isoformat()
         
         # Add moderator notes if provided
         if moderation.moderator_notes:
-            reviews[review_index]['moderator_notes'] = moderation.moderator_notes
+            review.moderator_notes = moderation.moderator_notes
         
-        await self._save_reviews(reviews)
+        self._track_status(review)
+        await self._save_reviews()
         
         # Populate metadata and return
-        review_dict = await self._populate_review_metadata(reviews[review_index])
-        return Review(**review_dict)
+        review_dict = await self._populate_review_metadata(review)
+        return _review_model(review_dict)
     
     async def get_reviews_for_water(
         self, 
@@ -287,34 +685,27 @@ class ReviewService:
         limit: int = 20
     ) -> Tuple[List[Review], int]:
         """Get reviews for a specific water bottle."""
-        reviews = await self._load_reviews()
+        await self._load_reviews()
         
         # Filter by water_id
-        water_reviews = [review for review in reviews if review['water_id'] == water_id]
+        water_reviews = self._reviews_for(self._ids_by_water, water_id)
         
         # Filter by status if provided
         if status:
-            water_reviews = [review for review in water_reviews if review['status'] == status]
+            water_reviews = [review for review in water_reviews if review.status == status]
         
         # Sort reviews
         reverse = sort_order.lower() == "desc"
-        if sort_by == "helpful":
-            water_reviews.sort(key=lambda x: x.get('helpful_votes', 0), reverse=reverse)
-        elif sort_by == "rating":
-            water_reviews.sort(key=lambda x: x.get('rating', 0), reverse=reverse)
-        else:  # created_at
-            water_reviews.sort(key=lambda x: x.get('created_at', ''), reverse=reverse)
+        sort_key = _WATER_REVIEW_SORT_KEYS.get(sort_by, _BY_CREATED_AT)
         
         total = len(water_reviews)
         
         # Apply pagination
-        paginated_reviews = water_reviews[skip:skip + limit]
+        paginated_reviews = _sorted_page(water_reviews, sort_key, reverse, skip, limit)
         
         # Populate metadata
-        result_reviews = []
-        for review_dict in paginated_reviews:
-            review_dict = await self._populate_review_metadata(review_dict)
-            result_reviews.append(Review(**review_dict))
+        paginated_reviews = await self._populate_review_metadata_batch(paginated_reviews)
+        result_reviews = [_review_model(review_dict) for review_dict in paginated_reviews]
         
         return result_reviews, total
     
@@ -325,24 +716,19 @@ class ReviewService:
         limit: int = 20
     ) -> Tuple[List[Review], int]:
         """Get reviews written by a specific user."""
-        reviews = await self._load_reviews()
+        await self._load_reviews()
         
         # Filter by user_id
-        user_reviews = [review for review in reviews if review['user_id'] == user_id]
-        
-        # Sort by creation date (newest first)
-        user_reviews.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+        user_reviews = self._reviews_for(self._ids_by_user, user_id)
         
         total = len(user_reviews)
         
-        # Apply pagination
-        paginated_reviews = user_reviews[skip:skip + limit]
+        # Apply pagination, sorted by creation date (newest first)
+        paginated_reviews = _sorted_page(user_reviews, _BY_CREATED_AT, True, skip, limit)
         
         # Populate metadata
-        result_reviews = []
-        for review_dict in paginated_reviews:
-            review_dict = await self._populate_review_metadata(review_dict)
-            result_reviews.append(Review(**review_dict))
+        paginated_reviews = await self._populate_review_metadata_batch(paginated_reviews)
+        result_reviews = [_review_model(review_dict) for review_dict in paginated_reviews]
         
         return result_reviews, total
     
@@ -352,21 +738,16 @@ class ReviewService:
         reviews = await self._load_reviews()
         
         # Check if user already voted on this review
-        existing_vote = next(
-            (vote for vote in votes 
-             if vote['user_id'] == user_id and vote['review_id'] == vote_data.review_id),
-            None
-        )
-        if existing_vote:
+        if (user_id, vote_data.review_id) in self._vote_pairs:
             raise ValueError("You have already voted on this review")
         
         # Check if review exists
-        review_index = next((i for i, review in enumerate(reviews) if review['id'] == vote_data.review_id), None)
-        if review_index is None:
+        review = reviews.get(vote_data.review_id)
+        if review is None:
             raise ValueError("Review not found")
         
         # Check if user is trying to vote on their own review
-        if reviews[review_index]['user_id'] == user_id:
+        if review.user_id == user_id:
             raise ValueError("You cannot vote on your own review")
         
         # Create vote
@@ -379,16 +760,16 @@ class ReviewService:
         }
         
         votes.append(vote_dict)
-        await self._save_votes(votes)
+        self._vote_pairs.add((user_id, vote_data.review_id))
+        self._next_vote_id += 1
         
         # Update review vote counts
-        reviews[review_index]['total_votes'] = reviews[review_index].get('total_votes', 0) + 1
+        review.total_votes += 1
         if vote_data.is_helpful:
-            reviews[review_index]['helpful_votes'] = reviews[review_index].get('helpful_votes', 0) + 1
-        
-        await self._save_reviews(reviews)
+            review.helpful_votes += 1
+            self._totals_by_user[review.user_id].helpful_votes += 1
         
-        self._next_vote_id += 1
+        await asyncio.gather(self._save_votes(votes), self._save_reviews())
         
         return ReviewVote(**vote_dict)
     
@@ -398,17 +779,12 @@ class ReviewService:
         reviews = await self._load_reviews()
         
         # Check if user already flagged this review
-        existing_flag = next(
-            (flag for flag in flags 
-             if flag['user_id'] == user_id and flag['review_id'] == flag_data.review_id),
-            None
-        )
-        if existing_flag:
+        if (user_id, flag_data.review_id) in self._flag_pairs:
             raise ValueError("You have already flagged this review")
         
         # Check if review exists
-        review_index = next((i for i, review in enumerate(reviews) if review['id'] == flag_data.review_id), None)
-        if review_index is None:
+        review = reviews.get(flag_data.review_id)
+        if review is None:
             raise ValueError("Review not found")
         
         # Create flag
@@ -422,32 +798,28 @@ class ReviewService:
         }
         
         flags.append(flag_dict)
-        await self._save_flags(flags)
+        self._flag_pairs.add((user_id, flag_data.review_id))
+        self._next_flag_id += 1
         
         # Update review flag count
-        reviews[review_index]['flagged_count'] = reviews[review_index].get('flagged_count', 0) + 1
+        review.flagged_count += 1
         
         # Auto-flag if too many flags
-        if reviews[review_index]['flagged_count'] >= 3:
-            reviews[review_index]['status'] = ReviewStatus.FLAGGED
-        
-        await self._save_reviews(reviews)
+        if review.flagged_count >= 3:
+            self._untrack_status(review)
+            review.status = ReviewStatus.FLAGGED
+            self._track_status(review)
         
-        self._next_flag_id += 1
+        await asyncio.gather(self._save_flags(flags), self._save_reviews())
         
         return ReviewFlag(**flag_dict)
     
     async def get_review_stats(self, water_id: int) -> ReviewStats:
         """Get review statistics for a water bottle."""
-        reviews = await self._load_reviews()
-        
-        # Filter approved reviews for this water
-        water_reviews = [
-            review for review in reviews 
-            if review['water_id'] == water_id and review['status'] == ReviewStatus.APPROVED
-        ]
+        await self._load_reviews()
         
-        if not water_reviews:
+        stats = self._stats_by_water.get(water_id)
+        if not stats or not stats.count:
             return ReviewStats(
                 water_id=water_id,
                 total_reviews=0,
@@ -455,52 +827,25 @@ class ReviewService:
                 rating_distribution={"1": 0, "2": 0, "3": 0, "4": 0, "5": 0}
             )
         
-        # Calculate statistics
-        total_reviews = len(water_reviews)
-        ratings = [review['rating'] for review in water_reviews]
-        average_rating = sum(ratings) / len(ratings)
-        
-        # Rating distribution
-        rating_distribution = {"1": 0, "2": 0, "3": 0, "4": 0, "5": 0}
-        for rating in ratings:
-            star_rating = str(int(round(rating)))
-            if star_rating in rating_distribution:
-                rating_distribution[star_rating] += 1
-        
-        # Detailed ratings
-        taste_ratings = [r['taste_rating'] for r in water_reviews if r.get('taste_rating')]
-        health_ratings = [r['health_rating'] for r in water_reviews if r.get('health_rating')]
-        value_ratings = [r['value_rating'] for r in water_reviews if r.get('value_rating')]
-        packaging_ratings = [r['packaging_rating'] for r in water_reviews if r.get('packaging_rating')]
-        
-        # Recent reviews (last 30 days)
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        recent_reviews = [
-            review for review in water_reviews
-            if datetime.fromisoformat(review['created_at'].replace('Z', '+00:00')) > thirty_days_ago
-        ]
-        
         return ReviewStats(
             water_id=water_id,
-            total_reviews=total_reviews,
-            average_rating=round(average_rating, 2),
-            rating_distribution=rating_distribution,
-            average_taste_rating=round(sum(taste_ratings) / len(taste_ratings), 2) if taste_ratings else None,
-            average_health_rating=round(sum(health_ratings) / len(health_ratings), 2) if health_ratings else None,
-            average_value_rating=round(sum(value_ratings) / len(value_ratings), 2) if value_ratings else None,
-            average_packaging_rating=round(sum(packaging_ratings) / len(packaging_ratings), 2) if packaging_ratings else None,
-            verified_purchase_count=len([r for r in water_reviews if r.get('is_verified_purchase')]),
-            recent_reviews_count=len(recent_reviews)
+            total_reviews=stats.count,
+            average_rating=round(stats.sum_rating / stats.count, 2),
+            rating_distribution={str(star): stats.rating_hist[star] for star in range(1, 6)},
+            average_taste_rating=stats.detailed_average('taste_rating'),
+            average_health_rating=stats.detailed_average('health_rating'),
+            average_value_rating=stats.detailed_average('value_rating'),
+            average_packaging_rating=stats.detailed_average('packaging_rating'),
+            verified_purchase_count=stats.verified_count,
+            recent_reviews_count=stats.recent_count(time.time())
         )
     
     async def get_user_review_summary(self, user_id: int) -> UserReviewSummary:
         """Get review summary for a user."""
-        reviews = await self._load_reviews()
+        await self._load_reviews()
         
-        # Filter user's reviews
-        user_reviews = [review for review in reviews if review['user_id'] == user_id]
-        
-        if not user_reviews:
+        totals = self._totals_by_user.get(user_id)
+        if not totals or not totals.count:
             return UserReviewSummary(
                 user_id=user_id,
                 total_reviews=0,
@@ -510,72 +855,48 @@ class ReviewService:
                 recent_reviews=0
             )
         
-        # Calculate statistics
-        total_reviews = len(user_reviews)
-        ratings = [review['rating'] for review in user_reviews]
-        average_rating_given = sum(ratings) / len(ratings)
-        helpful_votes_received = sum(review.get('helpful_votes', 0) for review in user_reviews)
-        verified_purchase_reviews = len([r for r in user_reviews if r.get('is_verified_purchase')])
-        
-        # Recent reviews (last 30 days)
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        recent_reviews = len([
-            review for review in user_reviews
-            if datetime.fromisoformat(review['created_at'].replace('Z', '+00:00')) > thirty_days_ago
-        ])
-        
         return UserReviewSummary(
             user_id=user_id,
-            total_reviews=total_reviews,
-            average_rating_given=round(average_rating_given, 2),
-            helpful_votes_received=helpful_votes_received,
-            verified_purchase_reviews=verified_purchase_reviews,
-            recent_reviews=recent_reviews
+            total_reviews=totals.count,
+            average_rating_given=round(totals.sum_rating / totals.count, 2),
+            helpful_votes_received=totals.helpful_votes,
+            verified_purchase_reviews=totals.verified_count,
+            recent_reviews=totals.created_index.count_recent(time.time())
         )
     
     async def get_pending_reviews(self, skip: int = 0, limit: int = 20) -> Tuple[List[Review], int]:
         """Get pending reviews for moderation."""
-        reviews = await self._load_reviews()
+        await self._load_reviews()
         
         # Filter pending reviews
-        pending_reviews = [review for review in reviews if review['status'] == ReviewStatus.PENDING]
-        
-        # Sort by creation date (oldest first for moderation queue)
-        pending_reviews.sort(key=lambda x: x.get('created_at', ''))
+        pending_reviews = self._reviews_for(self._ids_by_status, ReviewStatus.PENDING)
         
         total = len(pending_reviews)
         
-        # Apply pagination
-        paginated_reviews = pending_reviews[skip:skip + limit]
+        # Apply pagination, sorted by creation date (oldest first for moderation queue)
+        paginated_reviews = _sorted_page(pending_reviews, _BY_CREATED_AT, False, skip, limit)
         
         # Populate metadata
-        result_reviews = []
-        for review_dict in paginated_reviews:
-            review_dict = await self._populate_review_metadata(review_dict)
-            result_reviews.append(Review(**review_dict))
+        paginated_reviews = await self._populate_review_metadata_batch(paginated_reviews)
+        result_reviews = [_review_model(review_dict) for review_dict in paginated_reviews]
         
         return result_reviews, total
     
     async def get_flagged_reviews(self, skip: int = 0, limit: int = 20) -> Tuple[List[Review], int]:
         """Get flagged reviews for moderation."""
-        reviews = await self._load_reviews()
+        await self._load_reviews()
         
         # Filter flagged reviews
-        flagged_reviews = [review for review in reviews if review['status'] == ReviewStatus.FLAGGED]
-        
-        # Sort by flag count (highest first)
-        flagged_reviews.sort(key=lambda x: x.get('flagged_count', 0), reverse=True)
+        flagged_reviews = self._reviews_for(self._ids_by_status, ReviewStatus.FLAGGED)
         
         total = len(flagged_reviews)
         
-        # Apply pagination
-        paginated_reviews = flagged_reviews[skip:skip + limit]
+        # Apply pagination, sorted by flag count (highest first)
+        paginated_reviews = _sorted_page(flagged_reviews, _BY_FLAGGED_COUNT, True, skip, limit)
         
         # Populate metadata
-        result_reviews = []
-        for review_dict in paginated_reviews:
-            review_dict = await self._populate_review_metadata(review_dict)
-            result_reviews.append(Review(**review_dict))
+        paginated_reviews = await self._populate_review_metadata_batch(paginated_reviews)
+        result_reviews = [_review_model(review_dict) for review_dict in paginated_reviews]
         
         return result_reviews, total
 
@@ -1,8 +1,15 @@
-from typing import List, Dict, Any, Optional
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Callable, Awaitable, Tuple, NamedTuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func, or_
+from sqlalchemy import func, or_, literal, literal_column, cast, union_all, String, Float
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
+from app.core.cache import async_timed_lru_cache
 from app.models.search_system import (
     SearchQueryLog,
     SavedSearchFilter,
@@ -24,9 +31,175 @@ from app.models.water import Water
 from app.models.drink import Drink
 from app.models.health_goal import HealthGoal
 
+logger = logging.getLogger(__name__)
+
+SUGGESTION_CACHE_SECONDS = 60
+SUGGESTION_CACHE_SIZE = 4096
+ANALYTICS_FLUSH_SECONDS = 5
+
+class _SearchTerms(NamedTuple):
+    query: str
+    pattern: str  # ILIKE substring pattern, built once per search
+    full_text: bool  # Whether the database supports tsvector full-text search
+
+# Each entity type contributes one SELECT to the federated UNION ALL. The
+# branches share a column layout, so per-type metadata travels in two text
+# columns and is converted back by _METADATA_FIELDS.
+
+def _user_select(terms: _SearchTerms):
+    pattern = terms.pattern
+    return select(
+        literal(SearchableEntityType.USER.value).label("entity_type"),
+        User.id.label("entity_id"),
+        User.username.label("title"),
+        (literal("User profile for ") + User.username).label("description"),
+        literal(0.9).label("score"), # Simulated score
+        cast(User.email, String).label("meta_1"),
+        cast(User.created_at, String).label("meta_2")
+    ).where(or_(User.username.ilike(pattern), User.email.ilike(pattern)))
+
+def _drink_select(terms: _SearchTerms):
+    return select(
+        literal(SearchableEntityType.DRINK.value).label("entity_type"),
+        Drink.id.label("entity_id"),
+        Drink.name.label("title"),
+        literal("A type of beverage.").label("description"),
+        literal(0.8).label("score"),
+        cast(Drink.caffeine, String).label("meta_1"),
+        cast(Drink.sugar, String).label("meta_2")
+    ).where(Drink.name.ilike(terms.pattern))
+
+def _health_goal_select(terms: _SearchTerms):
+    # Descriptions are free-form prose, so on PostgreSQL goals are matched and
+    # ranked through a GIN-indexed tsvector instead of substring scans
+    if terms.full_text:
+        # Must match the expression of the ix_health_goals_search_tsv index
+        # (constants are inlined so the planner can match it textually)
+        document = func.to_tsvector(
+            literal_column("'english'"),
+            func.coalesce(HealthGoal.name, literal_column("''"))
+            .op("||")(literal_column("' '"))
+            .op("||")(func.coalesce(HealthGoal.description, literal_column("''")))
+        )
+        ts_query = func.plainto_tsquery("english", terms.query)
+        score = func.ts_rank_cd(document, ts_query)
+        condition = document.op("@@")(ts_query)
+    else:
+        score = literal(0.85)
+        condition = or_(HealthGoal.name.ilike(terms.pattern), HealthGoal.description.ilike(terms.pattern))
+    return select(
+        literal(SearchableEntityType.HEALTH_GOAL.value).label("entity_type"),
+        HealthGoal.id.label("entity_id"),
+        HealthGoal.name.label("title"),
+        HealthGoal.description.label("description"),
+        cast(score, Float).label("score"),
+        cast(HealthGoal.target, String).label("meta_1"),
+        cast(HealthGoal.deadline, String).label("meta_2")
+    ).where(condition)
+
+_ENTITY_SELECTS = {
+    SearchableEntityType.USER: _user_select,
+    SearchableEntityType.DRINK: _drink_select,
+    SearchableEntityType.HEALTH_GOAL: _health_goal_select,
+}
+
+_METADATA_FIELDS = {
+    SearchableEntityType.USER: (("email", str), ("join_date", str)),
+    SearchableEntityType.DRINK: (("caffeine", float), ("sugar", float)),
+    SearchableEntityType.HEALTH_GOAL: (("target", float), ("deadline", str)),
+}
+
+async def _upsert_search_analytics(session: AsyncSession, counts: Counter):
+    """Add each query's count to its analytics row in one executemany upsert.
+    
+    A single atomic upsert on the unique query_text, instead of a SELECT
+    followed by an UPDATE or INSERT that could race. Does not commit.
+    """
+    insert = sqlite_insert if session.bind.dialect.name == "sqlite" else pg_insert
+    stmt = insert(SearchAnalytics)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SearchAnalytics.query_text],
+        set_={
+            "search_frequency": SearchAnalytics.search_frequency + stmt.excluded.search_frequency,
+            "last_searched": stmt.excluded.last_searched
+        }
+    )
+    now = datetime.utcnow()
+    await session.execute(stmt, [
+        {"query_text": query, "search_frequency": count, "last_searched": now}
+        for query, count in counts.items()
+    ])
+
+class _SearchAnalyticsBuffer:
+    """Aggregates search counts in memory and writes them out periodically.
+    
+    Services are created per request, so the buffer is shared at module level.
+    Popular queries become one row update per flush instead of one per search;
+    counts still in the buffer when the process exits are lost, as nothing
+    flushes it on shutdown.
+    """
+    
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._counts: Counter = Counter()
+        self._lock = asyncio.Lock()
+        self._session_factory: Optional[Callable[[], AsyncSession]] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    async def add(self, query: str, session_factory: Callable[[], AsyncSession]):
+        async with self._lock:
+            self._counts[query] += 1
+        self._session_factory = session_factory
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop())
+    
+    async def flush(self):
+        """Write out everything buffered so far."""
+        async with self._lock:
+            counts, self._counts = self._counts, Counter()
+        if not counts:
+            return
+        try:
+            async with self._session_factory() as session:
+                await _upsert_search_analytics(session, counts)
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Error flushing search analytics: {e}")
+            # Keep the counts for the next attempt
+            async with self._lock:
+                self._counts.update(counts)
+    
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+_analytics_buffer = _SearchAnalyticsBuffer(ANALYTICS_FLUSH_SECONDS)
+
+def _result_item(row) -> SearchResultItem:
+    entity_type = SearchableEntityType(row.entity_type)
+    (key_1, convert_1), (key_2, convert_2) = _METADATA_FIELDS[entity_type]
+    return SearchResultItem(
+        entity_type=entity_type,
+        entity_id=row.entity_id,
+        title=row.title,
+        description=row.description,
+        score=row.score,
+        metadata={
+            key_1: convert_1(row.meta_1) if row.meta_1 is not None else None,
+            key_2: convert_2(row.meta_2) if row.meta_2 is not None else None
+        }
+    )
+
+
 class SearchSystemService:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, session_factory: Optional[Callable[[], AsyncSession]] = None):
+        # New rows are not refreshed after commit, which relies on the session
+        # keeping attributes loaded (expire_on_commit=False)
         self.db = db
+        # An AsyncSession cannot run statements concurrently, so the search and
+        # suggestion queries only overlap when they can each open their own session.
+        self.session_factory = session_factory
 
     async def search(
         self,
@@ -44,8 +217,6 @@ class SearchSystemService:
         if filters is None:
             filters = {}
         
-        results: List[SearchResultItem] = []
-        
         # Determine which entity types to search
         allowed_types_str = filters.get("types", [])
         if isinstance(allowed_types_str, str):
@@ -53,27 +224,23 @@ class SearchSystemService:
 
         search_types = [SearchableEntityType(t) for t in allowed_types_str] if allowed_types_str else list(SearchableEntityType)
 
-        # Simulate a federated search
-        if SearchableEntityType.USER in search_types:
-            results.extend(await self._search_users(query))
-        if SearchableEntityType.DRINK in search_types:
-            results.extend(await self._search_drinks(query))
-        if SearchableEntityType.HEALTH_GOAL in search_types:
-            results.extend(await self._search_health_goals(query))
-        
-        # In a real system, you'd have a more sophisticated ranking algorithm
-        # For now, we sort by a simulated score (could be based on match quality)
-        results.sort(key=lambda r: r.score, reverse=True)
-        
-        total_count = len(results)
-        paginated_results = results[(page - 1) * page_size : page * page_size]
+        # Simulate a federated search in a single round trip
+        offset = (page - 1) * page_size
+        if self.session_factory:
+            # Suggestions don't depend on the results, so they run alongside the search
+            (paginated_results, total_count), suggestions = await asyncio.gather(
+                self._in_own_session(self._search_entities, query, search_types, page_size, offset),
+                self._in_own_session(self._query_suggestions, query)
+            )
+        else:
+            paginated_results, total_count = await self._search_entities(
+                self.db, query, search_types, page_size, offset
+            )
+            suggestions = await self.get_query_suggestions(query)
         
         # Log the search query
         log_entry = await self.log_search_query(user_id, query, filters, total_count)
         
-        # Get suggestions (placeholder)
-        suggestions = await self.get_query_suggestions(query)
-        
         return SearchResponse(
             query_id=log_entry.id,
             results=paginated_results,
@@ -95,7 +262,6 @@ class SearchSystemService:
         await self._update_search_analytics(query)
         
         await self.db.commit()
-        await self.db.refresh(log)
         return log
 
     async def get_recommendations(self, user_id: int, limit: int = 10) -> List[Dict]:
@@ -121,7 +287,6 @@ class SearchSystemService:
         new_filter = SavedSearchFilter(user_id=user_id, **filter_data.dict())
         self.db.add(new_filter)
         await self.db.commit()
-        await self.db.refresh(new_filter)
         return new_filter
 
     async def get_saved_filters(self, user_id: int) -> List[SavedSearchFilterSchema]:
@@ -134,85 +299,84 @@ class SearchSystemService:
         """
         Provides autocomplete suggestions based on popular or recent queries.
         """
+        return await self._query_suggestions(self.db, partial_query)
+
+    # --- Private Search Helpers ---
+
+    async def _in_own_session(self, func: Callable[..., Awaitable[Any]], *args):
+        async with self.session_factory() as session:
+            return await func(session, *args)
+
+    # Autocomplete asks for the same popular prefixes over and over. The cache is
+    # shared by every service instance; matching ignores case, so neither does the key.
+    @async_timed_lru_cache(
+        seconds=SUGGESTION_CACHE_SECONDS,
+        maxsize=SUGGESTION_CACHE_SIZE,
+        key=lambda self, session, partial_query: partial_query.lower()
+    )
+    async def _query_suggestions(self, session: AsyncSession, partial_query: str) -> List[str]:
         if not partial_query:
             return []
         
-        result = await self.db.execute(
+        # A case-insensitive prefix written as lower(...) LIKE 'prefix%' can be
+        # answered by the ix_search_analytics_query_prefix range scan; ILIKE can't
+        result = await session.execute(
             select(SearchAnalytics.query_text)
-            .filter(SearchAnalytics.query_text.ilike(f"{partial_query}%"))
+            .filter(func.lower(SearchAnalytics.query_text).like(f"{partial_query.lower()}%"))
             .order_by(SearchAnalytics.search_frequency.desc())
             .limit(5)
         )
         return result.scalars().all()
 
-    # --- Private Search Helpers ---
-
-    async def _search_users(self, query: str) -> List[SearchResultItem]:
-        results = []
-        stmt = select(User).filter(
-            or_(
-                User.username.ilike(f"%{query}%"),
-                User.email.ilike(f"%{query}%")
-            )
+    async def _search_entities(
+        self,
+        session: AsyncSession,
+        query: str,
+        search_types: List[SearchableEntityType],
+        limit: int,
+        offset: int
+    ) -> Tuple[List[SearchResultItem], int]:
+        """Fetch one page of matches across the requested entity types, plus the total.
+        
+        Ranking and pagination happen in SQL so only the requested page is
+        transferred and turned into result items.
+        """
+        terms = _SearchTerms(
+            query=query,
+            pattern=f"%{query}%",
+            full_text=session.bind.dialect.name == "postgresql"
         )
-        db_results = await self.db.execute(stmt)
-        for user in db_results.scalars().all():
-            results.append(SearchResultItem(
-                entity_type=SearchableEntityType.USER,
-                entity_id=user.id,
-                title=user.username,
-                description=f"User profile for {user.username}",
-                score=0.9, # Simulated score
-                metadata={"email": user.email, "join_date": str(user.created_at)}
-            ))
-        return results
-
-    async def _search_drinks(self, query: str) -> List[SearchResultItem]:
-        results = []
-        stmt = select(Drink).filter(Drink.name.ilike(f"%{query}%"))
-        db_results = await self.db.execute(stmt)
-        for drink in db_results.scalars().all():
-            results.append(SearchResultItem(
-                entity_type=SearchableEntityType.DRINK,
-                entity_id=drink.id,
-                title=drink.name,
-                description=f"A type of beverage.",
-                score=0.8,
-                metadata={"caffeine": drink.caffeine, "sugar": drink.sugar}
-            ))
-        return results
+        selects = [
+            build_select(terms)
+            for entity_type, build_select in _ENTITY_SELECTS.items()
+            if entity_type in search_types
+        ]
+        if not selects:
+            return [], 0
         
-    async def _search_health_goals(self, query: str) -> List[SearchResultItem]:
-        results = []
-        stmt = select(HealthGoal).filter(
-            or_(
-                HealthGoal.name.ilike(f"%{query}%"),
-                HealthGoal.description.ilike(f"%{query}%")
-            )
+        matches = union_all(*selects).subquery()
+        # In a real system, you'd have a more sophisticated ranking algorithm
+        # For now, we rank by a simulated score (could be based on match quality)
+        stmt = (
+            select(matches, func.count().over().label("total_count"))
+            .order_by(matches.c.score.desc(), matches.c.entity_type, matches.c.entity_id)
+            .limit(limit)
+            .offset(offset)
         )
-        db_results = await self.db.execute(stmt)
-        for goal in db_results.scalars().all():
-            results.append(SearchResultItem(
-                entity_type=SearchableEntityType.HEALTH_GOAL,
-                entity_id=goal.id,
-                title=goal.name,
-                description=goal.description,
-                score=0.85,
-                metadata={"target": goal.target, "deadline": str(goal.deadline)}
-            ))
-        return results
+        rows = (await session.execute(stmt)).all()
+        if rows:
+            return [_result_item(row) for row in rows], rows[0].total_count
+        
+        # Past the last page the window count has no row to ride on
+        total_count = 0
+        if offset:
+            total_count = (await session.execute(select(func.count()).select_from(matches))).scalar_one()
+        return [], total_count
 
     async def _update_search_analytics(self, query: str):
-        result = await self.db.execute(
-            select(SearchAnalytics).filter(SearchAnalytics.query_text == query)
-        )
-        analytics_entry = result.scalars().first()
-
-        if analytics_entry:
-            analytics_entry.search_frequency += 1
-            analytics_entry.last_searched = func.now()
+        # Exact, up-to-the-second counts aren't needed, so when the buffer can
+        # open its own sessions the write is taken off the search path
+        if self.session_factory:
+            await _analytics_buffer.add(query, self.session_factory)
         else:
-            analytics_entry = SearchAnalytics(query_text=query)
-            self.db.add(analytics_entry)
-        
-        await self.db.flush() 
\ No newline at end of file
+            await _upsert_search_analytics(self.db, Counter({query: 1})) 
\ No newline at end of file
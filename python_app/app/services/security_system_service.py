@@ -1,6 +1,7 @@
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, AsyncIterator
 
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
@@ -18,33 +19,33 @@ from app.schemas.security_system import (
     SecurityEventSchema
 )
 
+# Rows fetched per round trip when streaming large listings
+STREAM_BATCH_SIZE = 1000
+
 class SecuritySystemService:
     def __init__(self, db: AsyncSession):
+        # Rows are returned without a refresh after commit; new IDs are filled in
+        # by the INSERT and the session must be created with expire_on_commit=False
         self.db = db
 
     async def log_audit_event(self, event_data: AuditLogCreate) -> AuditLog:
         """
         Logs a standard audit event. This is the primary method for recording actions.
         """
-        audit_log = AuditLog(**event_data.dict())
+        audit_log = self._build_audit_log(event_data)
         self.db.add(audit_log)
         await self.db.commit()
-        await self.db.refresh(audit_log)
         return audit_log
 
     async def log_security_event(self, event_data: SecurityEventCreate) -> SecurityEvent:
         """
         Logs a security-sensitive event that may require review.
         """
-        security_event = SecurityEvent(**event_data.dict())
+        security_event = self._build_security_event(event_data)
         self.db.add(security_event)
         await self.db.commit()
-        await self.db.refresh(security_event)
         
-        # In a real system, this might trigger an alert (e.g., email, PagerDuty)
-        if security_event.severity in [SeverityLevel.CRITICAL, SeverityLevel.HIGH]:
-            print(f"ALERT: Critical security event logged: {security_event.description}")
-            # alert_service.trigger_alert(...)
+        self._alert_if_severe(event_data)
             
         return security_event
 
@@ -58,18 +59,25 @@ class SecuritySystemService:
         """
         Retrieves a filtered list of audit logs.
         """
-        query = select(AuditLog).order_by(AuditLog.timestamp.desc())
-        
-        if user_id:
-            query = query.filter(AuditLog.user_id == user_id)
-        if event_type:
-            query = query.filter(AuditLog.event_type == event_type)
-            
-        query = query.offset(skip).limit(limit)
+        query = self._audit_log_query(user_id, event_type).offset(skip).limit(limit)
         
         result = await self.db.execute(query)
         return result.scalars().all()
 
+    async def stream_audit_logs(
+        self,
+        user_id: Optional[int] = None,
+        event_type: Optional[EventType] = None
+    ) -> AsyncIterator[AuditLogSchema]:
+        """
+        Streams every matching audit log for exports, holding at most one
+        batch of rows in memory at a time.
+        """
+        query = self._audit_log_query(user_id, event_type)
+        result = await self.db.stream_scalars(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+        async for audit_log in result:
+            yield AuditLogSchema.model_validate(audit_log)
+
     async def get_security_events(
         self,
         skip: int = 0,
@@ -80,18 +88,25 @@ class SecuritySystemService:
         """
         Retrieves a filtered list of security events.
         """
-        query = select(SecurityEvent).order_by(SecurityEvent.timestamp.desc())
-        
-        if is_resolved is not None:
-            query = query.filter(SecurityEvent.is_resolved == is_resolved)
-        if severity:
-            query = query.filter(SecurityEvent.severity == severity)
-            
-        query = query.offset(skip).limit(limit)
+        query = self._security_event_query(is_resolved, severity).offset(skip).limit(limit)
         
         result = await self.db.execute(query)
         return result.scalars().all()
 
+    async def stream_security_events(
+        self,
+        is_resolved: Optional[bool] = None,
+        severity: Optional[SeverityLevel] = None
+    ) -> AsyncIterator[SecurityEventSchema]:
+        """
+        Streams every matching security event for exports, holding at most one
+        batch of rows in memory at a time.
+        """
+        query = self._security_event_query(is_resolved, severity)
+        result = await self.db.stream_scalars(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+        async for event in result:
+            yield SecurityEventSchema.model_validate(event)
+
     async def resolve_security_event(self, event_id: int, resolver_user_id: int) -> Optional[SecurityEvent]:
         """
         Marks a security event as resolved.
@@ -107,7 +122,6 @@ class SecuritySystemService:
         event.resolved_at = datetime.utcnow()
         
         await self.db.commit()
-        await self.db.refresh(event)
         return event
 
     # --- Example Helper for other services ---
@@ -115,8 +129,74 @@ class SecuritySystemService:
     async def log_failed_login(self, ip_address: str, user_agent: str, username: str):
         """
         A specific helper to handle failed login attempts, which logs both
-        an audit event and a security event.
+        an audit event and a security event in a single transaction.
+        """
+        audit_data, security_event_data = self._failed_login_events(ip_address, user_agent, username)
+        
+        # You could add logic here to check for brute-force attacks
+        # e.g., if > 5 failed logins from same IP in 1 minute, create CRITICAL event.
+        
+        self.db.add_all([
+            self._build_audit_log(audit_data),
+            self._build_security_event(security_event_data)
+        ])
+        await self.db.commit()
+        self._alert_if_severe(security_event_data)
+
+    async def log_failed_login_bulk(self, attempts: List[Dict[str, str]]):
         """
+        Logs a batch of failed login attempts (e.g. collected by a rate limiter)
+        with one multi-row insert per table and a single commit.
+        Each attempt is a dict with ip_address, user_agent and username.
+        """
+        if not attempts:
+            return
+        
+        events = [
+            self._failed_login_events(attempt["ip_address"], attempt["user_agent"], attempt["username"])
+            for attempt in attempts
+        ]
+        await self.db.execute(insert(AuditLog), [audit_data.dict() for audit_data, _ in events])
+        await self.db.execute(insert(SecurityEvent), [event_data.dict() for _, event_data in events])
+        await self.db.commit()
+        for _, security_event_data in events:
+            self._alert_if_severe(security_event_data)
+
+    # --- Private Helper Methods ---
+
+    def _audit_log_query(self, user_id: Optional[int], event_type: Optional[EventType]):
+        query = select(AuditLog).order_by(AuditLog.timestamp.desc())
+        
+        if user_id:
+            query = query.filter(AuditLog.user_id == user_id)
+        if event_type:
+            query = query.filter(AuditLog.event_type == event_type)
+        return query
+
+    def _security_event_query(self, is_resolved: Optional[bool], severity: Optional[SeverityLevel]):
+        query = select(SecurityEvent).order_by(SecurityEvent.timestamp.desc())
+        
+        if is_resolved is not None:
+            query = query.filter(SecurityEvent.is_resolved == is_resolved)
+        if severity:
+            query = query.filter(SecurityEvent.severity == severity)
+        return query
+
+    def _build_audit_log(self, event_data: AuditLogCreate) -> AuditLog:
+        return AuditLog(**event_data.dict())
+
+    def _build_security_event(self, event_data: SecurityEventCreate) -> SecurityEvent:
+        return SecurityEvent(**event_data.dict())
+
+    def _alert_if_severe(self, security_event_data: SecurityEventCreate):
+        # In a real system, this might trigger an alert (e.g., email, PagerDuty)
+        if security_event_data.severity in [SeverityLevel.CRITICAL, SeverityLevel.HIGH]:
+            print(f"ALERT: Critical security event logged: {security_event_data.description}")
+            # alert_service.trigger_alert(...)
+
+    def _failed_login_events(
+        self, ip_address: str, user_agent: str, username: str
+    ) -> Tuple[AuditLogCreate, SecurityEventCreate]:
         audit_data = AuditLogCreate(
             event_type=EventType.FAILED_LOGIN_ATTEMPT,
             status=ActionStatus.FAILURE,
@@ -124,11 +204,6 @@ class SecuritySystemService:
             user_agent=user_agent,
             details={"username": username}
         )
-        await self.log_audit_event(audit_data)
-        
-        # You could add logic here to check for brute-force attacks
-        # e.g., if > 5 failed logins from same IP in 1 minute, create CRITICAL event.
-        
         security_event_data = SecurityEventCreate(
             event_type=EventType.FAILED_LOGIN_ATTEMPT,
             severity=SeverityLevel.MEDIUM,
@@ -136,4 +211,4 @@ class SecuritySystemService:
             description=f"Failed login attempt for username: {username}",
             metadata={"user_agent": user_agent}
         )
-        await self.log_security_event(security_event_data) 
\ No newline at end of file
+        return audit_data, security_event_data 
\ No newline at end of file
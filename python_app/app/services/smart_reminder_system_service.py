@@ -1,11 +1,16 @@
 import asyncio
+import time
+import uuid
+from bisect import bisect_left, insort
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Set
 import random
 import json
+from sqlalchemy import DateTime, Integer, column, insert, update, exists, values
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, joinedload
 
 from app.models.smart_reminder_system import (
     SmartReminder,
@@ -28,15 +33,59 @@ from app.schemas.smart_reminder_system import (
     ContextDataCreate
 )
 
+# Candidate times checked per conflict query; three bound parameters each keeps
+# a batch within every backend's parameter limit
+CONFLICT_CHECK_BATCH_SIZE = 300
+
+# Built once; list(ChannelType) would walk the enum members on every call
+_CHANNEL_CHOICES = tuple(ChannelType)
+
+# Retraining is CPU-bound, so it runs in a worker process rather than on the
+# event loop. Jobs are tracked per process by ID for polling, and finished
+# ones are forgotten after RETRAIN_JOB_RETENTION.
+RETRAIN_JOB_RETENTION = timedelta(hours=1)
+_training_executor: Optional[ProcessPoolExecutor] = None
+_retrain_jobs: Dict[str, Dict[str, Any]] = {}
+_retrain_tasks: Set[asyncio.Task] = set()
+
+def _expire_retrain_jobs():
+    cutoff = datetime.utcnow() - RETRAIN_JOB_RETENTION
+    for job_id in [
+        job_id for job_id, job in _retrain_jobs.items()
+        if job["finished_at"] is not None and job["finished_at"] < cutoff
+    ]:
+        del _retrain_jobs[job_id]
+
+def _get_training_executor() -> ProcessPoolExecutor:
+    global _training_executor
+    if _training_executor is None:
+        _training_executor = ProcessPoolExecutor(max_workers=1)
+    return _training_executor
+
+def _train_model_sync(model_type_value: str) -> None:
+    """
+    Placeholder for a full-scale model retraining pipeline. Runs in a worker process.
+    """
+    # 1. Gather all historical data (interactions, contexts)
+    # 2. Preprocess and create a new dataset
+    # 3. Train a new model version
+    # 4. Evaluate the model
+    # 5. If successful, save the new model and mark it as active
+    print(f"Initiating retraining for {model_type_value} models.")
+    time.sleep(10) # Simulate a long-running task
+    print("Retraining complete.")
+
 class SmartReminderSystemService:
     def __init__(self, db: AsyncSession):
+        # Rows aren't refreshed after commit: the primary key comes back from
+        # the INSERT, no column is generated server-side, and the session is
+        # expected not to expire objects on commit
         self.db = db
 
     async def create_smart_reminder(self, reminder_data: SmartReminderCreate) -> SmartReminder:
         new_reminder = SmartReminder(**reminder_data.dict())
         self.db.add(new_reminder)
         await self.db.commit()
-        await self.db.refresh(new_reminder)
         return new_reminder
 
     async def get_smart_reminder(self, reminder_id: int) -> Optional[SmartReminder]:
@@ -56,7 +105,7 @@ class SmartReminderSystemService:
         return result.scalars().all()
 
     async def update_smart_reminder(self, reminder_id: int, reminder_data: SmartReminderUpdate) -> Optional[SmartReminder]:
-        reminder = await self.get_smart_reminder(reminder_id)
+        reminder = await self._get_reminder_bare(reminder_id)
         if not reminder:
             return None
         
@@ -65,11 +114,10 @@ class SmartReminderSystemService:
             setattr(reminder, key, value)
             
         await self.db.commit()
-        await self.db.refresh(reminder)
         return reminder
 
     async def delete_smart_reminder(self, reminder_id: int) -> bool:
-        reminder = await self.get_smart_reminder(reminder_id)
+        reminder = await self._get_reminder_bare(reminder_id)
         if not reminder:
             return False
         await self.db.delete(reminder)
@@ -79,14 +127,21 @@ class SmartReminderSystemService:
     async def record_reminder_interaction(self, interaction_data: ReminderInteractionCreate) -> ReminderInteraction:
         new_interaction = ReminderInteraction(**interaction_data.dict())
         
-        instance = await self.db.get(ReminderInstance, new_interaction.reminder_instance_id)
+        # Load the instance and its reminder together; none of the reminder's
+        # other instances or interactions are needed to adjust its priority
+        result = await self.db.execute(
+            select(ReminderInstance)
+            .options(joinedload(ReminderInstance.reminder))
+            .filter(ReminderInstance.id == new_interaction.reminder_instance_id)
+        )
+        instance = result.scalars().first()
         if instance:
             if new_interaction.interaction_type == InteractionType.COMPLETED:
                 instance.status = ReminderStatus.COMPLETED
             elif new_interaction.interaction_type == InteractionType.DISMISSED:
                 instance.status = ReminderStatus.DISMISSED
             # Update reminder's adaptive properties based on interaction
-            reminder = await self.get_smart_reminder(instance.reminder_id)
+            reminder = instance.reminder
             if reminder:
                 # Basic learning: adjust priority based on completion
                 if new_interaction.interaction_type == InteractionType.COMPLETED:
@@ -96,7 +151,6 @@ class SmartReminderSystemService:
 
         self.db.add(new_interaction)
         await self.db.commit()
-        await self.db.refresh(new_interaction)
         return new_interaction
 
     async def schedule_reminders_for_user(self, user_id: int):
@@ -107,24 +161,34 @@ class SmartReminderSystemService:
         reminders = await self.get_smart_reminders_for_user(user_id)
         ml_model = await self.get_active_ml_model(ModelType.SCHEDULING)
         
-        for reminder in reminders:
-            if not reminder.is_active:
-                continue
-
-            # In a real system, this would call ml_model.predict()
-            predicted_time = self._predict_optimal_time(user_id, reminder, ml_model)
-            
-            # Check for conflicts
-            if not await self._has_scheduling_conflict(user_id, predicted_time):
-                instance = ReminderInstance(
-                    reminder_id=reminder.id,
-                    user_id=user_id,
-                    scheduled_time=predicted_time,
-                    status=ReminderStatus.SCHEDULED,
-                    channel=random.choice(list(ChannelType)) # Or predict channel
-                )
-                self.db.add(instance)
+        active_reminders = [reminder for reminder in reminders if reminder.is_active]
+        channels = random.choices(_CHANNEL_CHOICES, k=len(active_reminders)) # Or predict channel
+        # In a real system, this would call ml_model.predict()
+        predicted_times = [
+            self._predict_optimal_time(user_id, reminder, ml_model) for reminder in active_reminders
+        ]
+        
+        # Check every candidate against the stored schedule in one query; times
+        # accepted in this run are checked in memory
+        stored_conflicts = await self._scheduling_conflicts(user_id, predicted_times)
+        scheduled_times = []
+        new_instances = []
         
+        for reminder, channel, predicted_time, conflict in zip(
+            active_reminders, channels, predicted_times, stored_conflicts
+        ):
+            if not conflict and not self._conflicts_with(scheduled_times, predicted_time):
+                new_instances.append({
+                    "reminder_id": reminder.id,
+                    "user_id": user_id,
+                    "scheduled_time": predicted_time,
+                    "status": ReminderStatus.SCHEDULED,
+                    "channel": channel
+                })
+                insort(scheduled_times, predicted_time)
+        
+        if new_instances:
+            await self.db.execute(insert(ReminderInstance), new_instances)
         await self.db.commit()
 
     async def trigger_pending_reminders(self):
@@ -143,7 +207,14 @@ class SmartReminderSystemService:
         for instance in instances_to_send:
             # Here you would integrate with a notification service (e.g., email, push)
             print(f"Sending reminder {instance.id} for user {instance.user_id} via {instance.channel}")
-            instance.status = ReminderStatus.SENT
+        
+        # Mark the whole batch as sent with one statement and one commit
+        if instances_to_send:
+            await self.db.execute(
+                update(ReminderInstance)
+                .where(ReminderInstance.id.in_([instance.id for instance in instances_to_send]))
+                .values(status=ReminderStatus.SENT)
+            )
             await self.db.commit()
         
         return len(instances_to_send)
@@ -154,7 +225,6 @@ class SmartReminderSystemService:
         new_model = MLModel(**model_data.dict())
         self.db.add(new_model)
         await self.db.commit()
-        await self.db.refresh(new_model)
         return new_model
 
     async def get_active_ml_model(self, model_type: ModelType) -> Optional[MLModel]:
@@ -162,6 +232,7 @@ class SmartReminderSystemService:
             select(MLModel)
             .filter(MLModel.model_type == model_type, MLModel.is_active == True)
             .order_by(MLModel.version.desc())
+            .limit(1)
         )
         return result.scalars().first()
 
@@ -169,18 +240,27 @@ class SmartReminderSystemService:
         new_pattern = UserBehaviorPattern(**pattern_data.dict())
         self.db.add(new_pattern)
         await self.db.commit()
-        await self.db.refresh(new_pattern)
         return new_pattern
 
     async def log_context_data(self, context_data: ContextDataCreate) -> ContextData:
         new_context = ContextData(**context_data.dict())
         self.db.add(new_context)
         await self.db.commit()
-        await self.db.refresh(new_context)
         return new_context
 
     # --- Private Helper Methods ---
 
+    async def _get_reminder_bare(self, reminder_id: int) -> Optional[SmartReminder]:
+        """Fetch just the reminder row, for callers that only touch its own columns.
+        
+        get_smart_reminder eagerly loads every instance and interaction, which
+        can be thousands of rows for a long-running reminder.
+        """
+        result = await self.db.execute(
+            select(SmartReminder).filter(SmartReminder.id == reminder_id)
+        )
+        return result.scalars().first()
+
     def _predict_optimal_time(self, user_id: int, reminder: SmartReminder, model: Optional[MLModel]) -> datetime:
         """
         Placeholder for ML-based prediction.
@@ -203,21 +283,56 @@ class SmartReminderSystemService:
                     return now + timedelta(seconds=random_seconds)
             return datetime.utcnow() + timedelta(hours=random.uniform(1, 5))
 
+    @staticmethod
+    def _conflicts_with(scheduled_times: List[datetime], scheduled_time: datetime, buffer_minutes: int = 15) -> bool:
+        """
+        In-memory counterpart of _has_scheduling_conflict over a sorted list of times.
+        """
+        time_buffer = timedelta(minutes=buffer_minutes)
+        position = bisect_left(scheduled_times, scheduled_time - time_buffer)
+        return position < len(scheduled_times) and scheduled_times[position] <= scheduled_time + time_buffer
+
     async def _has_scheduling_conflict(self, user_id: int, scheduled_time: datetime, buffer_minutes: int = 15) -> bool:
         """
         Checks if another reminder is scheduled too close to the given time.
         """
+        conflicts = await self._scheduling_conflicts(user_id, [scheduled_time], buffer_minutes)
+        return conflicts[0]
+
+    async def _scheduling_conflicts(self, user_id: int, scheduled_times: List[datetime], buffer_minutes: int = 15) -> List[bool]:
+        """
+        Checks several candidate times at once, returning one flag per time in order.
+        """
+        if not scheduled_times:
+            return []
         time_buffer = timedelta(minutes=buffer_minutes)
-        result = await self.db.execute(
-            select(ReminderInstance.id)
-            .filter(
-                ReminderInstance.user_id == user_id,
-                ReminderInstance.status == ReminderStatus.SCHEDULED,
-                ReminderInstance.scheduled_time >= scheduled_time - time_buffer,
-                ReminderInstance.scheduled_time <= scheduled_time + time_buffer
+        conflicts = []
+        for start in range(0, len(scheduled_times), CONFLICT_CHECK_BATCH_SIZE):
+            batch = scheduled_times[start:start + CONFLICT_CHECK_BATCH_SIZE]
+            # The candidate windows go in as a VALUES list, and each one is
+            # probed for an undelivered instance of the user's reminders,
+            # giving one row per candidate
+            candidates = values(
+                column("position", Integer),
+                column("window_start", DateTime),
+                column("window_end", DateTime),
+                name="candidates"
+            ).data([
+                (position, scheduled_time - time_buffer, scheduled_time + time_buffer)
+                for position, scheduled_time in enumerate(batch)
+            ]).cte()
+            result = await self.db.execute(
+                select(
+                    exists().where(
+                        ReminderInstance.reminder_id == SmartReminder.id,
+                        SmartReminder.user_id == user_id,
+                        ReminderInstance.delivery_status == "pending",
+                        ReminderInstance.scheduled_time.between(candidates.c.window_start, candidates.c.window_end)
+                    )
+                ).select_from(candidates).order_by(candidates.c.position)
             )
-        )
-        return result.scalars().first() is not None
+            conflicts.extend(bool(conflict) for conflict in result.scalars())
+        return conflicts
 
     async def get_user_behavior_patterns(self, user_id: int) -> List[UserBehaviorPattern]:
         result = await self.db.execute(
@@ -237,15 +352,44 @@ class SmartReminderSystemService:
         )
         return result.scalars().all()
 
-    async def retrain_model(self, model_type: ModelType):
+    async def retrain_model(self, model_type: ModelType) -> str:
         """
-        Placeholder for a full-scale model retraining pipeline.
+        Starts retraining in the background and returns a job ID to poll.
+
+        Raises ValueError while a job for the same model type is still training.
         """
-        # 1. Gather all historical data (interactions, contexts)
-        # 2. Preprocess and create a new dataset
-        # 3. Train a new model version
-        # 4. Evaluate the model
-        # 5. If successful, save the new model and mark it as active
-        print(f"Initiating retraining for {model_type.value} models.")
-        await asyncio.sleep(10) # Simulate a long-running task
-        print("Retraining complete.") 
\ No newline at end of file
+        _expire_retrain_jobs()
+        if any(
+            job["model_type"] == model_type.value and job["status"] == "training"
+            for job in _retrain_jobs.values()
+        ):
+            raise ValueError(f"A {model_type.value} model is already being retrained")
+        job_id = uuid.uuid4().hex
+        _retrain_jobs[job_id] = {
+            "job_id": job_id,
+            "model_type": model_type.value,
+            "status": "training",
+            "started_at": datetime.utcnow(),
+            "finished_at": None,
+            "error": None
+        }
+        task = asyncio.create_task(self._run_retraining(job_id, model_type))
+        _retrain_tasks.add(task)
+        task.add_done_callback(_retrain_tasks.discard)
+        return job_id
+
+    def get_retrain_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        _expire_retrain_jobs()
+        return _retrain_jobs.get(job_id)
+
+    async def _run_retraining(self, job_id: str, model_type: ModelType):
+        job = _retrain_jobs[job_id]
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(_get_training_executor(), _train_model_sync, model_type.value)
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = str(e)
+        else:
+            job["status"] = "completed"
+        job["finished_at"] = datetime.utcnow() 
\ No newline at end of file
@@ -1,21 +1,52 @@
 import logging
 import json
-from sqlalchemy.orm import Session
-from typing import List, Optional, Dict
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import Row, and_, or_, select, insert, update, delete, exists, literal, tuple_
+from fastapi import BackgroundTasks
+from sqlalchemy.orm import Session, aliased
+from typing import Any, Iterator, List, Optional, Dict, Tuple
 
+from app.core.cache import TTLCache
 from app.db import models as db_models
+from app.db.database import SessionLocal, insert_ignoring_conflicts
 from app.services.user_service import user_service # Use singleton instance
 from app.core.websockets import manager
-from app.models.social import FriendshipStatus, Follower, FriendRequest, Comment
+from app.models.social import FriendshipStatus
 from app.services.push_notification_service import push_notification_service
 from app.services.base_service import BaseService
-from app.models.user import User
 from app.schemas.social import FriendRequestCreate, FriendRequestUpdate, CommentCreate, CommentUpdate
 from app.services import notification_service
 
 logger = logging.getLogger(__name__)
 
-class SocialService(BaseService[Follower, None, None]):  # Follower has no create/update schema here
+# How many of a user's latest activities are copied into a new follower's timeline
+TIMELINE_BACKFILL_SIZE = 50
+
+# Follow counts are read on every profile view but change rarely; entries are
+# dropped on follow/unfollow and otherwise expire after FOLLOW_COUNTS_CACHE_SECONDS
+FOLLOW_COUNTS_CACHE_SECONDS = 120
+_follow_counts_cache = TTLCache(seconds=FOLLOW_COUNTS_CACHE_SECONDS, maxsize=10000)
+
+# Rows hydrated at a time when streaming every comment of an achievement
+COMMENT_STREAM_BATCH_SIZE = 500
+
+def _encode_feed_cursor(created_at: datetime, activity_id: int) -> str:
+    """Cursor for the page after an activity: its created_at, with its ID to break ties"""
+    return f"{created_at.isoformat()}_{activity_id}"
+
+def _decode_feed_cursor(cursor: str) -> Tuple[datetime, int]:
+    """(created_at, activity_id) of a feed cursor; raises ValueError if it is malformed"""
+    created_at, _, activity_id = cursor.rpartition("_")
+    return datetime.fromisoformat(created_at), int(activity_id)
+
+def _next_feed_cursor(activities, limit: int) -> Optional[str]:
+    # A short page means there is nothing older left
+    if not activities or len(activities) < limit:
+        return None
+    return _encode_feed_cursor(activities[-1].created_at, activities[-1].id)
+
+class SocialService(BaseService[db_models.UserFollow, None, None]):  # UserFollow has no create/update schema here
     def __init__(self):
         # In a real app, a proper dependency injection system would be used
         self.user_service = user_service
@@ -23,165 +54,412 @@ class SocialService(BaseService[Follower, None, None]):  # Follower has no creat
     async def create_activity(
         self, db: Session, user_id: int, activity_type: str, data: dict
     ) -> db_models.Activity:
-        """Create and store a new activity in the database."""
-        new_activity = db_models.Activity(
-            user_id=user_id,
-            activity_type=activity_type,
-            content=data.get("content", "")
-        )
-        db.add(new_activity)
+        """Create and store a new activity and fan it out to its readers' timelines."""
+        # RETURNING hands back the row with its ID in the same statement as the insert
+        new_activity = db.scalars(
+            insert(db_models.Activity).returning(db_models.Activity),
+            [self._activity_values(user_id, activity_type, data)]
+        ).one()
+        self._fan_out_activities(db, [new_activity.id])
         # The commit is expected to be handled by the calling service that orchestrates the operation.
         return new_activity
 
-    async def get_user_activity_feed(self, db: Session, user_id: int, limit: int = 50) -> List[db_models.Activity]:
+    async def create_activities_bulk(self, db: Session, rows: List[dict]) -> List[db_models.Activity]:
+        """
+        Create several activities at once, e.g. for an event that records more
+        than one action. Each row has user_id, activity_type and data keys.
+        """
+        if not rows:
+            return []
+        new_activities = db.scalars(
+            insert(db_models.Activity).returning(db_models.Activity, sort_by_parameter_order=True),
+            [self._activity_values(row["user_id"], row["activity_type"], row["data"]) for row in rows]
+        ).all()
+        self._fan_out_activities(db, [activity.id for activity in new_activities])
+        # The commit is expected to be handled by the calling service that orchestrates the operation.
+        return new_activities
+
+    def _activity_values(self, user_id: int, activity_type: str, data: dict) -> dict:
+        return {
+            "user_id": user_id,
+            "activity_type": activity_type,
+            "data": data,
+            "created_at": datetime.utcnow(),
+        }
+
+    def _fan_out_activities(self, db: Session, activity_ids: List[int]):
+        """Copy new activities onto the timelines of their authors and the authors' followers."""
+        Activity = db_models.Activity
+        UserFollow = db_models.UserFollow
+        # One INSERT ... SELECT covers every reader of every activity, without
+        # bringing the follower IDs back to Python; the (following_id,
+        # follower_id) index serves the join
+        to_followers = select(UserFollow.follower_id, Activity.id, Activity.user_id, Activity.created_at)\
+            .join(Activity, Activity.user_id == UserFollow.following_id)\
+            .where(Activity.id.in_(activity_ids))
+        to_authors = select(Activity.user_id, Activity.id, Activity.user_id, Activity.created_at)\
+            .where(Activity.id.in_(activity_ids))
+        db.execute(
+            insert(db_models.TimelineEntry).from_select(
+                ["user_id", "activity_id", "author_id", "created_at"],
+                to_followers.union_all(to_authors)
+            )
+        )
+
+    async def get_user_activity_feed(
+        self, db: Session, user_id: int, limit: int = 50, cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         Get the activity feed for a user, including their own activities and
-        those of users they follow.
+        those of users they follow, as {"items": [...], "next_cursor": ...}.
+
+        Activities are fanned out to timelines when they are created, so this
+        reads only the user's own timeline. Pass next_cursor back as cursor to
+        get the next page; it is None after the last one.
         """
-        following_relations = self.get_following(db, user_id)
-        following_ids = [f.following_id for f in following_relations]
-        user_ids_for_feed = following_ids + [user_id]
-        
-        return db.query(db_models.Activity)\
-                 .filter(db_models.Activity.user_id.in_(user_ids_for_feed))\
-                 .order_by(db_models.Activity.created_at.desc())\
-                 .limit(limit)\
-                 .all()
+        TimelineEntry = db_models.TimelineEntry
+        query = db.query(db_models.Activity)\
+                  .join(TimelineEntry, TimelineEntry.activity_id == db_models.Activity.id)\
+                  .filter(TimelineEntry.user_id == user_id)
+        if cursor is not None:
+            # Seek instead of OFFSET: the (user_id, created_at) index starts right at the
+            # cursor. The activity ID breaks ties, since fanned-out entries and bulk
+            # inserts share timestamps.
+            query = query.filter(
+                tuple_(TimelineEntry.created_at, TimelineEntry.activity_id) < tuple_(*_decode_feed_cursor(cursor))
+            )
+        activities = query.order_by(TimelineEntry.created_at.desc(), TimelineEntry.activity_id.desc())\
+                          .limit(limit)\
+                          .all()
+        return {"items": activities, "next_cursor": _next_feed_cursor(activities, limit)}
 
-    def follow_user(self, db: Session, *, follower_id: int, followed_id: int) -> Follower:
+    def follow_user(self, db: Session, *, follower_id: int, followed_id: int) -> db_models.UserFollow:
         if follower_id == followed_id:
             raise ValueError("User cannot follow themselves.")
-        
-        existing = db.query(Follower).filter_by(follower_id=follower_id, followed_id=followed_id).first()
-        if existing:
-            return existing
+        UserFollow = db_models.UserFollow
 
-        db_follower = Follower(follower_id=follower_id, followed_id=followed_id)
-        db.add(db_follower)
+        # The (follower_id, following_id) primary key makes this atomic: either
+        # the new row comes back, or nothing does because the user already follows them
+        db_follower = db.execute(
+            insert_ignoring_conflicts(db, UserFollow)
+            .values(follower_id=follower_id, following_id=followed_id)
+            .returning(UserFollow)
+        ).scalar_one_or_none()
+        if db_follower is None:
+            return db.get(UserFollow, (follower_id, followed_id))
+
+        followed_back = db.query(
+            db.query(UserFollow).filter_by(follower_id=followed_id, following_id=follower_id).exists()
+        ).scalar()
+        if followed_back:
+            self._link_friends(db, follower_id, followed_id)
+        self._backfill_timeline(db, user_id=follower_id, author_id=followed_id)
+        self._adjust_follow_counts(db, [(follower_id, followed_id)], 1)
         db.commit()
-        db.refresh(db_follower)
-        logger.info(f"User {follower_id} is now following {followed_id}")
+        _follow_counts_cache.delete(follower_id, followed_id)
+        logger.info("User %s is now following %s", follower_id, followed_id)
         return db_follower
 
     def unfollow_user(self, db: Session, *, follower_id: int, followed_id: int) -> bool:
-        db_follower = db.query(Follower).filter_by(follower_id=follower_id, followed_id=followed_id).first()
-        if db_follower:
-            db.delete(db_follower)
-            db.commit()
-            logger.info(f"User {follower_id} unfollowed {followed_id}")
-            return True
-        return False
-
-    def get_followers(self, db: Session, *, user_id: int) -> List[User]:
-        return db.query(User).join(Follower, User.id == Follower.follower_id).filter(Follower.followed_id == user_id).all()
-
-    def get_following(self, db: Session, *, user_id: int) -> List[User]:
-        return db.query(User).join(Follower, User.id == Follower.followed_id).filter(Follower.follower_id == user_id).all()
-
-    def get_friends(self, db: Session, *, user_id: int) -> List[User]:
-        # Friends are mutual followers
-        following = {user.id for user in self.get_following(db, user_id=user_id)}
-        followers = {user.id for user in self.get_followers(db, user_id=user_id)}
-        friend_ids = following.intersection(followers)
-        return db.query(User).filter(User.id.in_(friend_ids)).all()
+        UserFollow = db_models.UserFollow
+        result = db.execute(
+            delete(UserFollow).where(UserFollow.follower_id == follower_id, UserFollow.following_id == followed_id)
+        )
+        if not result.rowcount:
+            return False
+
+        self._adjust_follow_counts(db, [(follower_id, followed_id)], -1)
+        self._unlink_friends(db, follower_id, followed_id)
+        db.query(db_models.TimelineEntry)\
+          .filter_by(user_id=follower_id, author_id=followed_id)\
+          .delete(synchronize_session=False)
+        db.commit()
+        _follow_counts_cache.delete(follower_id, followed_id)
+        logger.info("User %s unfollowed %s", follower_id, followed_id)
+        return True
+
+    def get_followers(self, db: Session, *, user_id: int) -> List[db_models.User]:
+        User, UserFollow = db_models.User, db_models.UserFollow
+        return db.query(User).join(UserFollow, User.id == UserFollow.follower_id)\
+                 .filter(UserFollow.following_id == user_id).all()
+
+    def get_following(self, db: Session, *, user_id: int) -> List[db_models.User]:
+        User, UserFollow = db_models.User, db_models.UserFollow
+        return db.query(User).join(UserFollow, User.id == UserFollow.following_id)\
+                 .filter(UserFollow.follower_id == user_id).all()
+
+    def get_follow_edges(self, db: Session, *, user_id: int) -> Dict[str, List[db_models.User]]:
+        """Followers and followed users together, in one round trip for pages that show both."""
+        User, UserFollow = db_models.User, db_models.UserFollow
+        followers = select(User, literal("followers").label("direction"))\
+            .join(UserFollow, User.id == UserFollow.follower_id)\
+            .where(UserFollow.following_id == user_id)
+        following = select(User, literal("following").label("direction"))\
+            .join(UserFollow, User.id == UserFollow.following_id)\
+            .where(UserFollow.follower_id == user_id)
+        edges = followers.union_all(following).subquery()
+        edges_user = aliased(User, edges)
+
+        result = {"followers": [], "following": []}
+        for user, direction in db.execute(select(edges_user, edges.c.direction)):
+            result[direction].append(user)
+        return result
+
+    def get_friends(self, db: Session, *, user_id: int) -> List[db_models.User]:
+        return db.query(db_models.User).filter(db_models.User.id.in_(self._friend_ids_select(user_id))).all()
+
+    def _friend_ids_select(self, user_id: int):
+        """IDs of the user's friends, as a subquery for use in IN (...) filters.
+
+        Friends are mutual followers. Rather than self-joining the follow graph
+        on every read, they are looked up in the FriendPair table.
+        """
+        return select(db_models.FriendPair.friend_id).where(db_models.FriendPair.user_id == user_id)
+
+    def _backfill_timeline(self, db: Session, *, user_id: int, author_id: int):
+        """Copy an author's latest activities into a new follower's timeline; the caller commits."""
+        Activity = db_models.Activity
+        TimelineEntry = db_models.TimelineEntry
+        # Entries already on the timeline are skipped
+        latest = select(Activity.id, Activity.created_at)\
+            .where(
+                Activity.user_id == author_id,
+                ~exists().where(TimelineEntry.user_id == user_id, TimelineEntry.activity_id == Activity.id)
+            )\
+            .order_by(Activity.created_at.desc())\
+            .limit(TIMELINE_BACKFILL_SIZE)\
+            .subquery()
+        db.execute(
+            insert(TimelineEntry).from_select(
+                ["user_id", "activity_id", "author_id", "created_at"],
+                select(literal(user_id), latest.c.id, literal(author_id), latest.c.created_at)
+            )
+        )
+
+    def _notify_friend_request(self, addressee_id: int, requester_id: int):
+        """Background task: runs after the request's session is closed, so it opens its own."""
+        db = SessionLocal()
+        try:
+            notification_service.create_friend_request_notification(db, user_id=addressee_id, requester_id=requester_id)
+        except Exception as e:
+            logger.error("Error sending friend request notification to %s: %s", addressee_id, e)
+        finally:
+            db.close()
+
+    def _adjust_follow_counts(self, db: Session, follows, delta: int):
+        """Apply added (delta=1) or removed (delta=-1) follow edges to the users' counters.
+
+        follows are (follower_id, following_id) pairs, as in user_follows.
+        Issues one UPDATE per affected user; the caller commits.
+        """
+        following = Counter(follower_id for follower_id, _ in follows)
+        followers = Counter(following_id for _, following_id in follows)
+        User = db_models.User
+        user_ids = following.keys() | followers.keys()
+        for user_id in user_ids:
+            db.execute(
+                update(User)
+                .where(User.id == user_id)
+                .values(
+                    following_count=User.following_count + following[user_id] * delta,
+                    followers_count=User.followers_count + followers[user_id] * delta
+                )
+            )
+        # Cached users carry the counters too, and Core UPDATEs skip the
+        # user service's own invalidation
+        self.user_service.forget_cached_users(db, user_ids)
+
+    def _link_friends(self, db: Session, user_id: int, friend_id: int):
+        """Record a mutual follow in both directions, if not already known; the caller commits."""
+        db.execute(insert_ignoring_conflicts(db, db_models.FriendPair).values([
+            {"user_id": user_id, "friend_id": friend_id},
+            {"user_id": friend_id, "friend_id": user_id}
+        ]))
+
+    def _unlink_friends(self, db: Session, user_id: int, friend_id: int):
+        """Forget a mutual follow in both directions; the caller commits."""
+        FriendPair = db_models.FriendPair
+        db.query(FriendPair).filter(or_(
+            and_(FriendPair.user_id == user_id, FriendPair.friend_id == friend_id),
+            and_(FriendPair.user_id == friend_id, FriendPair.friend_id == user_id)
+        )).delete(synchronize_session=False)
 
     def get_follow_counts(self, db: Session, user_id: int) -> Dict[str, int]:
         """Get follower and following counts for a user."""
-        followers_count = db.query(Follower).filter_by(followed_id=user_id).count()
-        following_count = db.query(Follower).filter_by(follower_id=user_id).count()
-        return {"followers_count": followers_count, "following_count": following_count}
+        counts = _follow_counts_cache.get(user_id)
+        if counts is None:
+            user = db.get(db_models.User, user_id)
+            counts = {
+                "followers_count": user.followers_count if user else 0,
+                "following_count": user.following_count if user else 0
+            }
+            _follow_counts_cache.set(user_id, counts)
+        # Callers get their own dict so they can't alter the cached one
+        return dict(counts)
+
+    def create_friend_request(
+        self, db: Session, *, requester_id: int, addressee_id: int,
+        background_tasks: Optional[BackgroundTasks] = None
+    ) -> db_models.FriendRequest:
+        """Send a friend request and notify the addressee.
 
-    def create_friend_request(self, db: Session, *, requester_id: int, addressee_id: int) -> FriendRequest:
+        When background_tasks is given, the notification is written after the
+        response has been sent instead of before returning.
+        """
         if requester_id == addressee_id:
             raise ValueError("Cannot send a friend request to oneself.")
         
-        existing_request = db.query(FriendRequest).filter_by(requester_id=requester_id, addressee_id=addressee_id, status="pending").first()
-        if existing_request:
-            return existing_request # Or raise an error that request is already pending
+        FriendRequest = db_models.FriendRequest
+        # At most one pending request per pair is enforced by a partial unique index
+        db_request = db.execute(
+            insert_ignoring_conflicts(
+                db, FriendRequest,
+                index_elements=[FriendRequest.requester_id, FriendRequest.addressee_id],
+                index_where=FriendRequest.status == "pending"
+            )
+            .values(requester_id=requester_id, addressee_id=addressee_id, status="pending")
+            .returning(FriendRequest)
+        ).scalar_one_or_none()
+        if db_request is None:
+            # Or raise an error that request is already pending
+            return db.query(FriendRequest).filter_by(requester_id=requester_id, addressee_id=addressee_id, status="pending").one()
 
-        db_request = FriendRequest(requester_id=requester_id, addressee_id=addressee_id)
-        db.add(db_request)
         db.commit()
-        db.refresh(db_request)
-        notification_service.create_friend_request_notification(db, user_id=addressee_id, requester_id=requester_id)
-        logger.info(f"Friend request sent from {requester_id} to {addressee_id}")
+        if background_tasks is not None:
+            background_tasks.add_task(self._notify_friend_request, addressee_id, requester_id)
+        else:
+            notification_service.create_friend_request_notification(db, user_id=addressee_id, requester_id=requester_id)
+        logger.info("Friend request sent from %s to %s", requester_id, addressee_id)
         return db_request
 
-    def respond_to_friend_request(self, db: Session, *, request_id: int, new_status: str, user_id: int) -> FriendRequest:
-        db_request = db.query(FriendRequest).get(request_id)
+    def respond_to_friend_request(
+        self, db: Session, *, request_id: int, new_status: str, user_id: int
+    ) -> db_models.FriendRequest:
+        db_request = db.get(db_models.FriendRequest, request_id)
         if not db_request or db_request.addressee_id != user_id:
             raise ValueError("Friend request not found or user not authorized.")
         
         db_request.status = new_status
-        if new_status == "accepted":
-            self.follow_user(db, follower_id=db_request.requester_id, followed_id=db_request.addressee_id)
-            self.follow_user(db, follower_id=db_request.addressee_id, followed_id=db_request.requester_id)
+        accepted = new_status == "accepted"
+        if accepted:
+            # Both follows, the friendship and the timelines go in with the
+            # status change as one transaction; existing follows are left alone
+            requester_id, addressee_id = db_request.requester_id, db_request.addressee_id
+            UserFollow = db_models.UserFollow
+            new_follows = db.execute(
+                insert_ignoring_conflicts(db, UserFollow).values([
+                    {"follower_id": requester_id, "following_id": addressee_id},
+                    {"follower_id": addressee_id, "following_id": requester_id}
+                ]).returning(UserFollow.follower_id, UserFollow.following_id)
+            ).all()
+            self._adjust_follow_counts(db, new_follows, 1)
+            self._link_friends(db, requester_id, addressee_id)
+            self._backfill_timeline(db, user_id=requester_id, author_id=addressee_id)
+            self._backfill_timeline(db, user_id=addressee_id, author_id=requester_id)
         
         db.add(db_request)
         db.commit()
+        if accepted:
+            _follow_counts_cache.delete(requester_id, addressee_id)
         db.refresh(db_request)
         return db_request
 
-    def get_pending_requests(self, db: Session, *, user_id: int) -> List[FriendRequest]:
-        return db.query(FriendRequest).filter_by(addressee_id=user_id, status="pending").all()
+    def get_pending_requests(self, db: Session, *, user_id: int) -> List[Row]:
+        """
+        List the requests waiting on a user as (id, requester_id, created_at)
+        rows; they are only displayed, so no ORM objects are built.
+        """
+        FriendRequest = db_models.FriendRequest
+        return db.execute(
+            select(FriendRequest.id, FriendRequest.requester_id, FriendRequest.created_at)
+            .where(FriendRequest.addressee_id == user_id, FriendRequest.status == "pending")
+        ).all()
 
-    def get_social_feed(self, db: Session, user_id: int, limit: int = 50) -> List[dict]:
+    def get_social_feed(
+        self, db: Session, user_id: int, limit: int = 50, cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
-        Get the social feed for a user, containing activities from their friends.
+        Get the social feed for a user, containing activities from their friends,
+        as {"items": [...], "next_cursor": ...}. Pass next_cursor back as cursor
+        to get the next page; it is None after the last one.
         """
-        friends = self.get_friends(db, user_id)
-        friend_ids = [friend.id for friend in friends]
+        Activity = db_models.Activity
+        # Get activities from friends, resolving who they are in the same query
+        activities = db.query(Activity).filter(Activity.user_id.in_(self._friend_ids_select(user_id)))
+        if cursor is not None:
+            # Seek on the (user_id, created_at) index rather than skipping rows with
+            # OFFSET; the ID breaks ties between activities created together
+            activities = activities.filter(tuple_(Activity.created_at, Activity.id) < tuple_(*_decode_feed_cursor(cursor)))
+        activities = activities.order_by(Activity.created_at.desc(), Activity.id.desc()).limit(limit).all()
 
-        if not friend_ids:
-            return []
+        # A feed is usually dominated by a few authors; look each one up once
+        authors = self._load_user_display(db, {activity.user_id for activity in activities})
 
-        # Get activities from friends
-        activities = db.query(
-            db_models.Activity,
-            db_models.User.username,
-            db_models.UserProfile.profile_picture_url
-        ).join(
-            db_models.User, db_models.Activity.user_id == db_models.User.id
-        ).join(
-            db_models.UserProfile, db_models.User.id == db_models.UserProfile.user_id, isouter=True
-        ).filter(
-            db_models.Activity.user_id.in_(friend_ids)
-        ).order_by(
-            db_models.Activity.created_at.desc()
-        ).limit(limit).all()
-
-        return [
+        items = [
             {
                 "id": activity.id,
                 "user_id": activity.user_id,
-                "username": username,
-                "profile_picture_url": profile_picture_url,
+                "username": authors[activity.user_id].username,
+                "profile_picture_url": authors[activity.user_id].profile_picture_url,
                 "activity_type": activity.activity_type,
                 "content": activity.data,
                 "created_at": activity.created_at
             }
-            for activity, username, profile_picture_url in activities
+            for activity in activities
         ]
+        return {"items": items, "next_cursor": _next_feed_cursor(activities, limit)}
+
+    def _load_user_display(self, db: Session, user_ids) -> Dict[int, Row]:
+        """Username and profile picture of each given user, in one query keyed by user ID."""
+        if not user_ids:
+            return {}
+        rows = db.execute(
+            select(db_models.User.id, db_models.User.username, db_models.UserProfile.profile_picture_url)
+            .outerjoin(db_models.UserProfile, db_models.UserProfile.user_id == db_models.User.id)
+            .where(db_models.User.id.in_(user_ids))
+        ).all()
+        return {row.id: row for row in rows}
 
-    def create_comment(self, db: Session, *, user_achievement_id: int, user_id: int, content: str) -> Comment:
-        db_comment = Comment(user_achievement_id=user_achievement_id, user_id=user_id, content=content)
+    def create_comment(self, db: Session, *, user_achievement_id: int, user_id: int, content: str) -> db_models.Comment:
+        db_comment = db_models.Comment(user_achievement_id=user_achievement_id, user_id=user_id, content=content)
         db.add(db_comment)
         db.commit()
-        db.refresh(db_comment)
         # Notify the achievement owner
         # achievement_owner_id = ... get owner from user_achievement_id
         # notification_service.create_comment_notification(db, user_id=achievement_owner_id, commenter_id=user_id)
         return db_comment
 
-    def get_comments(self, db: Session, *, user_achievement_id: int) -> List[Comment]:
-        return db.query(Comment).filter_by(user_achievement_id=user_achievement_id).order_by(Comment.timestamp.asc()).all()
+    def get_comments(
+        self, db: Session, *, user_achievement_id: int, limit: int = 100,
+        after_ts: Optional[datetime] = None, after_id: Optional[int] = None
+    ) -> List[db_models.Comment]:
+        """
+        Get a page of comments, oldest first. Pass the created_at and id of the
+        last comment of a page as after_ts and after_id to get the next one.
+        """
+        Comment = db_models.Comment
+        query = db.query(Comment).filter(Comment.user_achievement_id == user_achievement_id)
+        if after_ts is not None and after_id is not None:
+            # id breaks ties, so comments sharing the boundary timestamp are not skipped
+            query = query.filter(tuple_(Comment.created_at, Comment.id) > tuple_(after_ts, after_id))
+        elif after_ts is not None:
+            query = query.filter(Comment.created_at > after_ts)
+        return query.order_by(Comment.created_at.asc(), Comment.id.asc()).limit(limit).all()
+
+    def stream_comments(self, db: Session, *, user_achievement_id: int) -> Iterator[db_models.Comment]:
+        """
+        Streams every comment of an achievement for exports, holding at most
+        one batch of rows in memory at a time.
+        """
+        Comment = db_models.Comment
+        query = select(Comment)\
+            .where(Comment.user_achievement_id == user_achievement_id)\
+            .order_by(Comment.created_at.asc(), Comment.id.asc())
+        yield from db.scalars(query.execution_options(yield_per=COMMENT_STREAM_BATCH_SIZE))
         
     def delete_comment(self, db: Session, *, comment_id: int) -> bool:
-        comment = db.query(Comment).get(comment_id)
-        if comment:
-            db.delete(comment)
-            db.commit()
-            return True
-        return False
+        result = db.execute(delete(db_models.Comment).where(db_models.Comment.id == comment_id))
+        db.commit()
+        return result.rowcount > 0
 
 social_service = SocialService() 
\ No newline at end of file
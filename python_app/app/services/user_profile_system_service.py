@@ -1,5 +1,6 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc, asc, text
+from fastapi import BackgroundTasks
+from sqlalchemy.orm import Session, joinedload, object_session
+from sqlalchemy import Row, and_, or_, func, desc, asc, text, select, insert, event, literal_column
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Any, Tuple
 import json
@@ -7,11 +8,13 @@ import uuid
 import logging
 from enum import Enum
 import hashlib
+import operator
 import os
 from PIL import Image
 import requests
 from io import BytesIO
 import boto3
+from boto3.s3.transfer import TransferConfig
 from dataclasses import dataclass
 
 from app.models.user_profile_system import (
@@ -21,10 +24,107 @@ from app.models.user_profile_system import (
     HealthGoalType, NotificationFrequency, DataSharingLevel, PrivacyLevel
 )
 from app.models.user import User
+from app.core.cache import TTLCache, attach_cached, cache_row, invalidate_on_commit
+from app.db.database import insert_ignoring_conflicts
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Profiles and preferences are cached per worker process, across requests.
+# Entries are plain column dicts rather than ORM instances, since every
+# request has its own session. Invalidation only reaches this process, so
+# the TTL bounds how long other workers serve an old profile.
+PROFILE_CACHE_SECONDS = 60
+_profile_cache = TTLCache(seconds=PROFILE_CACHE_SECONDS, maxsize=10000)
+
+# Site-wide profile statistics are fine to serve slightly stale
+PROFILE_STATISTICS_CACHE_SECONDS = 60
+_statistics_cache = TTLCache(seconds=PROFILE_STATISTICS_CACHE_SECONDS, maxsize=1)
+
+# Avatars are usually far below the threshold and go up in a single PUT;
+# larger uploads are split into parts sent concurrently
+AVATAR_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=1 * 1024 * 1024,
+    max_concurrency=4,
+    use_threads=True
+)
+
+# Largest avatar a client may send; also enforced by the presigned POST policy
+AVATAR_MAX_BYTES = 5 * 1024 * 1024
+AVATAR_UPLOAD_URL_SECONDS = 300
+# Uploads already in avatar format and no larger than this skip re-encoding
+AVATAR_PASSTHROUGH_BYTES = 30 * 1024
+
+# Profiles removed per DELETE ... WHERE id IN (...) by cleanup_inactive_profiles
+CLEANUP_BATCH_SIZE = 1000
+
+# Fields counted towards the profile completion percentage
+_COMPLETION_FIELDS = (
+    'display_name', 'bio', 'location', 'birth_date', 'gender',
+    'height', 'weight', 'activity_level', 'timezone',
+    'wake_up_time', 'sleep_time', 'avatar_url'
+)
+_get_completion_fields = operator.attrgetter(*_COMPLETION_FIELDS)
+
+# Fields profile analytics reports as missing, with their display names
+_RECOMMENDED_FIELDS = {
+    'display_name': 'Display Name',
+    'bio': 'Bio',
+    'location': 'Location',
+    'birth_date': 'Birth Date',
+    'gender': 'Gender',
+    'height': 'Height',
+    'weight': 'Weight',
+    'avatar_url': 'Profile Picture'
+}
+_get_recommended_fields = operator.attrgetter(*_RECOMMENDED_FIELDS)
+
+# What a profile search result card shows; the large free-form and JSON
+# health columns are left out
+_PROFILE_CARD_COLUMNS = (
+    UserProfile.id, UserProfile.user_id, UserProfile.display_name, UserProfile.bio,
+    UserProfile.location, UserProfile.website, UserProfile.gender, UserProfile.avatar_url,
+    UserProfile.profile_visibility, UserProfile.activity_level, UserProfile.is_verified,
+    UserProfile.profile_completion_percentage, UserProfile.show_location, UserProfile.show_stats,
+    UserProfile.created_at, UserProfile.updated_at
+)
+
+# Tables whose rows belong to a single profile
+_PROFILE_CHILD_MODELS = (
+    UserPreferences, UserPrivacySettings, UserCustomizations, UserAchievement,
+    UserSocialConnection, UserHealthProfile, UserActivityProfile
+)
+
+def _profile_search_document():
+    # Must match the expression of the ix_user_profiles_search_tsv index
+    # (constants are inlined so the planner can match it textually)
+    return func.to_tsvector(
+        literal_column("'simple'"),
+        func.coalesce(UserProfile.display_name, literal_column("''"))
+        .op("||")(literal_column("' '"))
+        .op("||")(func.coalesce(UserProfile.bio, literal_column("''")))
+        .op("||")(literal_column("' '"))
+        .op("||")(func.coalesce(UserProfile.location, literal_column("''")))
+    )
+
+def _invalidate_cached_profile(mapper, connection, target):
+    # Preferences belong to the profile, and a profile delete removes them in bulk
+    # without firing their own events
+    invalidate_on_commit(
+        object_session(target), _profile_cache.delete, f"profile_{target.user_id}", f"preferences_{target.user_id}"
+    )
+
+def _invalidate_cached_preferences(mapper, connection, target):
+    user_id = connection.execute(
+        select(UserProfile.user_id).where(UserProfile.id == target.profile_id)
+    ).scalar()
+    invalidate_on_commit(object_session(target), _profile_cache.delete, f"preferences_{user_id}")
+
+# Any flushed change to a cached row drops its entry, whichever code path made it
+for _event_name in ('after_update', 'after_delete'):
+    event.listen(UserProfile, _event_name, _invalidate_cached_profile)
+    event.listen(UserPreferences, _event_name, _invalidate_cached_preferences)
+
 @dataclass
 class ProfileAnalytics:
     completion_percentage: float
@@ -36,8 +136,10 @@ class ProfileAnalytics:
 class UserProfileSystemService:
     def __init__(self, db: Session):
         self.db = db
-        self.profile_cache = {}
-        self.preferences_cache = {}
+        # Read once here rather than on every upload
+        self.aws_bucket = os.getenv('AWS_S3_BUCKET')
+        self.aws_region = os.getenv('AWS_REGION', 'us-east-1')
+        self.s3_base_url = f"https://{self.aws_bucket}.s3.amazonaws.com"
         self.s3_client = self._initialize_s3_client()
         
     def _initialize_s3_client(self):
@@ -47,7 +149,7 @@ class UserProfileSystemService:
                 's3',
                 aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
                 aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-                region_name=os.getenv('AWS_REGION', 'us-east-1')
+                region_name=self.aws_region
             )
         except Exception as e:
             logger.warning(f"S3 client initialization failed: {str(e)}")
@@ -57,11 +159,8 @@ class UserProfileSystemService:
     def create_user_profile(self, user_id: str, profile_data: Dict[str, Any]) -> UserProfile:
         """Create a new user profile"""
         try:
-            # Check if profile already exists
-            existing_profile = self.get_user_profile(user_id)
-            if existing_profile:
-                raise ValueError("Profile already exists for this user")
-            
+            # One timestamp for the profile and its settings rows
+            now = datetime.utcnow()
             profile = UserProfile(
                 id=str(uuid.uuid4()),
                 user_id=user_id,
@@ -78,28 +177,33 @@ class UserProfileSystemService:
                 wake_up_time=profile_data.get("wake_up_time"),
                 sleep_time=profile_data.get("sleep_time"),
                 profile_visibility=profile_data.get("profile_visibility", ProfileVisibility.FRIENDS),
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow()
+                created_at=now,
+                updated_at=now
             )
             
-            self.db.add(profile)
-            self.db.commit()
-            self.db.refresh(profile)
-            
-            # Create default preferences
-            self._create_default_preferences(profile.id)
-            
-            # Create default privacy settings
-            self._create_default_privacy_settings(profile.id)
-            
-            # Create default customizations
-            self._create_default_customizations(profile.id)
-            
             # Calculate initial completion percentage
             self._update_profile_completion(profile)
             
-            # Clear cache
-            self.profile_cache.pop(user_id, None)
+            # The unique user_id decides whether a profile already exists, so two
+            # concurrent creates cannot both get past an existence check.
+            # Unset columns are left out to keep their column defaults.
+            profile_values = {key: value for key, value in cache_row(profile).items() if value is not None}
+            profile = self.db.scalars(
+                insert_ignoring_conflicts(self.db, UserProfile, index_elements=['user_id'])
+                .values(**profile_values)
+                .returning(UserProfile)
+            ).one_or_none()
+            if profile is None:
+                raise ValueError("Profile already exists for this user")
+            
+            # The profile and its default settings are written in one transaction.
+            # The settings rows are never used as objects here, so they go in
+            # as plain Core inserts without ORM bookkeeping.
+            self.db.execute(insert(UserPreferences), [self._create_default_preferences(profile.id, now)])
+            self.db.execute(insert(UserPrivacySettings), [self._create_default_privacy_settings(profile.id, now)])
+            self.db.execute(insert(UserCustomizations), [self._create_default_customizations(profile.id, now)])
+            self.db.commit()
+            self.db.refresh(profile)
             
             logger.info(f"Created user profile for user: {user_id}")
             return profile
@@ -109,17 +213,24 @@ class UserProfileSystemService:
             self.db.rollback()
             raise
 
-    def get_user_profile(self, user_id: str) -> Optional[UserProfile]:
-        """Get user profile by user ID"""
-        if user_id in self.profile_cache:
-            return self.profile_cache[user_id]
-            
-        profile = self.db.query(UserProfile).filter(
+    def get_user_profile(self, user_id: str, *related) -> Optional[UserProfile]:
+        """Get user profile by user ID
+
+        related names one-to-one relationships (e.g. UserProfile.preferences)
+        to load in the same query, for callers that go on to read them.
+        """
+        cached = _profile_cache.get(f"profile_{user_id}")
+        if cached is not None:
+            return attach_cached(self.db, UserProfile, cached)
+            
+        profile = self.db.query(UserProfile).options(
+            *(joinedload(relationship) for relationship in related)
+        ).filter(
             UserProfile.user_id == user_id
         ).first()
         
         if profile:
-            self.profile_cache[user_id] = profile
+            _profile_cache.set(f"profile_{user_id}", cache_row(profile))
             
         return profile
 
@@ -136,13 +247,13 @@ class UserProfileSystemService:
             if not profile:
                 return None
                 
-            # Update profile fields
-            for key, value in update_data.items():
-                if hasattr(profile, key) and value is not None:
-                    setattr(profile, key, value)
+            # Update profile fields; an update that changes nothing writes nothing
+            if not self._apply_updates(profile, update_data):
+                return profile
                     
-            profile.updated_at = datetime.utcnow()
-            profile.last_profile_update = datetime.utcnow()
+            now = datetime.utcnow()
+            profile.updated_at = now
+            profile.last_profile_update = now
             
             # Update completion percentage
             self._update_profile_completion(profile)
@@ -150,9 +261,6 @@ class UserProfileSystemService:
             self.db.commit()
             self.db.refresh(profile)
             
-            # Clear cache
-            self.profile_cache.pop(user_id, None)
-            
             logger.info(f"Updated user profile: {user_id}")
             return profile
             
@@ -161,6 +269,15 @@ class UserProfileSystemService:
             self.db.rollback()
             raise
 
+    def _apply_updates(self, instance, update_data: Dict[str, Any]) -> bool:
+        """Set the given non-None fields on instance; returns whether any value changed"""
+        changed = False
+        for key, value in update_data.items():
+            if hasattr(instance, key) and value is not None and getattr(instance, key) != value:
+                setattr(instance, key, value)
+                changed = True
+        return changed
+
     def delete_user_profile(self, user_id: str) -> bool:
         """Delete user profile and all associated data"""
         try:
@@ -168,42 +285,17 @@ class UserProfileSystemService:
             if not profile:
                 return False
                 
-            # Delete associated data
-            self.db.query(UserPreferences).filter(
-                UserPreferences.profile_id == profile.id
-            ).delete()
-            
-            self.db.query(UserPrivacySettings).filter(
-                UserPrivacySettings.profile_id == profile.id
-            ).delete()
-            
-            self.db.query(UserCustomizations).filter(
-                UserCustomizations.profile_id == profile.id
-            ).delete()
-            
-            self.db.query(UserAchievement).filter(
-                UserAchievement.profile_id == profile.id
-            ).delete()
-            
-            self.db.query(UserSocialConnection).filter(
-                UserSocialConnection.profile_id == profile.id
-            ).delete()
-            
-            self.db.query(UserHealthProfile).filter(
-                UserHealthProfile.profile_id == profile.id
-            ).delete()
-            
-            self.db.query(UserActivityProfile).filter(
-                UserActivityProfile.profile_id == profile.id
-            ).delete()
+            # Associated data goes with the profile through ON DELETE CASCADE.
+            # SQLite only enforces foreign keys with PRAGMA foreign_keys on, so
+            # there the child rows are still removed explicitly.
+            if self.db.bind.dialect.name == "sqlite":
+                for model in _PROFILE_CHILD_MODELS:
+                    self.db.query(model).filter(model.profile_id == profile.id).delete()
             
             # Delete profile
             self.db.delete(profile)
             self.db.commit()
             
-            # Clear cache
-            self.profile_cache.pop(user_id, None)
-            
             logger.info(f"Deleted user profile: {user_id}")
             return True
             
@@ -212,133 +304,98 @@ class UserProfileSystemService:
             self.db.rollback()
             raise
 
-    def _create_default_preferences(self, profile_id: str) -> UserPreferences:
-        """Create default user preferences"""
-        try:
-            preferences = UserPreferences(
-                id=str(uuid.uuid4()),
-                profile_id=profile_id,
-                language=LanguageCode.EN,
-                unit_system=UnitSystem.METRIC,
-                theme=ThemePreference.AUTO,
-                notification_frequency=NotificationFrequency.NORMAL,
-                default_container_size=500,
-                reminder_interval=60,
-                smart_reminders=True,
-                weather_adjustments=True,
-                activity_adjustments=True,
-                allow_friend_requests=True,
-                show_online_status=True,
-                data_sharing_level=DataSharingLevel.AGGREGATED,
-                analytics_tracking=True,
-                personalized_insights=True,
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow()
-            )
-            
-            self.db.add(preferences)
-            self.db.commit()
-            
-            return preferences
-            
-        except Exception as e:
-            logger.error(f"Error creating default preferences: {str(e)}")
-            self.db.rollback()
-            raise
+    def _create_default_preferences(self, profile_id: str, now: datetime) -> Dict[str, Any]:
+        """Column values of the default user preferences; the caller inserts and commits them"""
+        preferences = dict(
+            id=str(uuid.uuid4()),
+            profile_id=profile_id,
+            language=LanguageCode.EN,
+            unit_system=UnitSystem.METRIC,
+            theme=ThemePreference.AUTO,
+            notification_frequency=NotificationFrequency.NORMAL,
+            default_container_size=500,
+            reminder_interval=60,
+            smart_reminders=True,
+            weather_adjustments=True,
+            activity_adjustments=True,
+            allow_friend_requests=True,
+            show_online_status=True,
+            data_sharing_level=DataSharingLevel.AGGREGATED,
+            analytics_tracking=True,
+            personalized_insights=True,
+            created_at=now,
+            updated_at=now
+        )
+        
+        return preferences
 
-    def _create_default_privacy_settings(self, profile_id: str) -> UserPrivacySettings:
-        """Create default privacy settings"""
-        try:
-            privacy_settings = UserPrivacySettings(
-                id=str(uuid.uuid4()),
-                profile_id=profile_id,
-                privacy_level=PrivacyLevel.BALANCED,
-                allow_analytics=True,
-                allow_crash_reporting=True,
-                profile_searchable=True,
-                show_in_leaderboards=True,
-                share_anonymous_data=True,
-                allow_marketing_emails=False,
-                allow_product_updates=True,
-                allow_location_tracking=False,
-                two_factor_enabled=False,
-                login_notifications=True,
-                data_retention_period=365,
-                auto_delete_old_data=False,
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow()
-            )
-            
-            self.db.add(privacy_settings)
-            self.db.commit()
-            
-            return privacy_settings
-            
-        except Exception as e:
-            logger.error(f"Error creating default privacy settings: {str(e)}")
-            self.db.rollback()
-            raise
+    def _create_default_privacy_settings(self, profile_id: str, now: datetime) -> Dict[str, Any]:
+        """Column values of the default privacy settings; the caller inserts and commits them"""
+        privacy_settings = dict(
+            id=str(uuid.uuid4()),
+            profile_id=profile_id,
+            privacy_level=PrivacyLevel.BALANCED,
+            allow_analytics=True,
+            allow_crash_reporting=True,
+            profile_searchable=True,
+            show_in_leaderboards=True,
+            share_anonymous_data=True,
+            allow_marketing_emails=False,
+            allow_product_updates=True,
+            allow_location_tracking=False,
+            two_factor_enabled=False,
+            login_notifications=True,
+            data_retention_period=365,
+            auto_delete_old_data=False,
+            created_at=now,
+            updated_at=now
+        )
+        
+        return privacy_settings
 
-    def _create_default_customizations(self, profile_id: str) -> UserCustomizations:
-        """Create default customizations"""
-        try:
-            customizations = UserCustomizations(
-                id=str(uuid.uuid4()),
-                profile_id=profile_id,
-                primary_color="#2196F3",
-                secondary_color="#FFC107",
-                accent_color="#FF5722",
-                dashboard_layout={
-                    "widgets": [
-                        {"type": "hydration_progress", "position": 1, "size": "large"},
-                        {"type": "daily_goal", "position": 2, "size": "medium"},
-                        {"type": "streak_counter", "position": 3, "size": "small"},
-                        {"type": "recent_activity", "position": 4, "size": "medium"}
-                    ]
-                },
-                widget_preferences={
-                    "hydration_progress": {"enabled": True, "style": "circular"},
-                    "daily_goal": {"enabled": True, "show_percentage": True},
-                    "streak_counter": {"enabled": True, "show_best_streak": True},
-                    "weather_widget": {"enabled": True, "show_recommendations": True}
-                },
-                custom_hydration_goals={
-                    "morning_goal": 500,
-                    "afternoon_goal": 1000,
-                    "evening_goal": 500
-                },
-                favorite_drink_types=["water", "herbal_tea", "fruit_water"],
-                quick_actions=["log_water", "set_reminder", "view_progress", "start_challenge"],
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow()
-            )
-            
-            self.db.add(customizations)
-            self.db.commit()
-            
-            return customizations
-            
-        except Exception as e:
-            logger.error(f"Error creating default customizations: {str(e)}")
-            self.db.rollback()
-            raise
+    def _create_default_customizations(self, profile_id: str, now: datetime) -> Dict[str, Any]:
+        """Column values of the default customizations; the caller inserts and commits them"""
+        customizations = dict(
+            id=str(uuid.uuid4()),
+            profile_id=profile_id,
+            primary_color="#2196F3",
+            secondary_color="#FFC107",
+            accent_color="#FF5722",
+            dashboard_layout={
+                "widgets": [
+                    {"type": "hydration_progress", "position": 1, "size": "large"},
+                    {"type": "daily_goal", "position": 2, "size": "medium"},
+                    {"type": "streak_counter", "position": 3, "size": "small"},
+                    {"type": "recent_activity", "position": 4, "size": "medium"}
+                ]
+            },
+            widget_preferences={
+                "hydration_progress": {"enabled": True, "style": "circular"},
+                "daily_goal": {"enabled": True, "show_percentage": True},
+                "streak_counter": {"enabled": True, "show_best_streak": True},
+                "weather_widget": {"enabled": True, "show_recommendations": True}
+            },
+            custom_hydration_goals={
+                "morning_goal": 500,
+                "afternoon_goal": 1000,
+                "evening_goal": 500
+            },
+            favorite_drink_types=["water", "herbal_tea", "fruit_water"],
+            quick_actions=["log_water", "set_reminder", "view_progress", "start_challenge"],
+            created_at=now,
+            updated_at=now
+        )
+        
+        return customizations
 
     def _update_profile_completion(self, profile: UserProfile) -> None:
         """Update profile completion percentage"""
         try:
-            required_fields = [
-                'display_name', 'bio', 'location', 'birth_date', 'gender',
-                'height', 'weight', 'activity_level', 'timezone',
-                'wake_up_time', 'sleep_time', 'avatar_url'
-            ]
-            
-            completed_fields = 0
-            for field in required_fields:
-                value = getattr(profile, field)
-                if value is not None and value != "":
-                    completed_fields += 1
+            completed_fields = sum(
+                1 for value in _get_completion_fields(profile) if value is not None and value != ""
+            )
             
-            completion_percentage = (completed_fields / len(required_fields)) * 100
+            completion_percentage = (completed_fields / len(_COMPLETION_FIELDS)) * 100
             profile.profile_completion_percentage = completion_percentage
             
         except Exception as e:
@@ -348,19 +405,18 @@ class UserProfileSystemService:
     def get_user_preferences(self, user_id: str) -> Optional[UserPreferences]:
         """Get user preferences"""
         cache_key = f"preferences_{user_id}"
-        if cache_key in self.preferences_cache:
-            return self.preferences_cache[cache_key]
+        cached = _profile_cache.get(cache_key)
+        if cached is not None:
+            return attach_cached(self.db, UserPreferences, cached)
             
-        profile = self.get_user_profile(user_id)
+        profile = self.get_user_profile(user_id, UserProfile.preferences)
         if not profile:
             return None
             
-        preferences = self.db.query(UserPreferences).filter(
-            UserPreferences.profile_id == profile.id
-        ).first()
+        preferences = profile.preferences
         
         if preferences:
-            self.preferences_cache[cache_key] = preferences
+            _profile_cache.set(cache_key, cache_row(preferences))
             
         return preferences
 
@@ -371,20 +427,15 @@ class UserProfileSystemService:
             if not preferences:
                 return None
                 
-            # Update preferences fields
-            for key, value in update_data.items():
-                if hasattr(preferences, key) and value is not None:
-                    setattr(preferences, key, value)
+            # Update preferences fields; an update that changes nothing writes nothing
+            if not self._apply_updates(preferences, update_data):
+                return preferences
                     
             preferences.updated_at = datetime.utcnow()
             
             self.db.commit()
             self.db.refresh(preferences)
             
-            # Clear cache
-            cache_key = f"preferences_{user_id}"
-            self.preferences_cache.pop(cache_key, None)
-            
             logger.info(f"Updated user preferences: {user_id}")
             return preferences
             
@@ -396,13 +447,11 @@ class UserProfileSystemService:
     # Privacy Settings Management
     def get_user_privacy_settings(self, user_id: str) -> Optional[UserPrivacySettings]:
         """Get user privacy settings"""
-        profile = self.get_user_profile(user_id)
+        profile = self.get_user_profile(user_id, UserProfile.privacy_settings)
         if not profile:
             return None
             
-        return self.db.query(UserPrivacySettings).filter(
-            UserPrivacySettings.profile_id == profile.id
-        ).first()
+        return profile.privacy_settings
 
     def update_user_privacy_settings(self, user_id: str, update_data: Dict[str, Any]) -> Optional[UserPrivacySettings]:
         """Update user privacy settings"""
@@ -411,10 +460,9 @@ class UserProfileSystemService:
             if not privacy_settings:
                 return None
                 
-            # Update privacy settings fields
-            for key, value in update_data.items():
-                if hasattr(privacy_settings, key) and value is not None:
-                    setattr(privacy_settings, key, value)
+            # Update privacy settings fields; an update that changes nothing writes nothing
+            if not self._apply_updates(privacy_settings, update_data):
+                return privacy_settings
                     
             privacy_settings.updated_at = datetime.utcnow()
             
@@ -432,13 +480,11 @@ class UserProfileSystemService:
     # Customizations Management
     def get_user_customizations(self, user_id: str) -> Optional[UserCustomizations]:
         """Get user customizations"""
-        profile = self.get_user_profile(user_id)
+        profile = self.get_user_profile(user_id, UserProfile.customizations)
         if not profile:
             return None
             
-        return self.db.query(UserCustomizations).filter(
-            UserCustomizations.profile_id == profile.id
-        ).first()
+        return profile.customizations
 
     def update_user_customizations(self, user_id: str, update_data: Dict[str, Any]) -> Optional[UserCustomizations]:
         """Update user customizations"""
@@ -447,10 +493,9 @@ class UserProfileSystemService:
             if not customizations:
                 return None
                 
-            # Update customizations fields
-            for key, value in update_data.items():
-                if hasattr(customizations, key) and value is not None:
-                    setattr(customizations, key, value)
+            # Update customizations fields; an update that changes nothing writes nothing
+            if not self._apply_updates(customizations, update_data):
+                return customizations
                     
             customizations.updated_at = datetime.utcnow()
             
@@ -466,31 +511,29 @@ class UserProfileSystemService:
             raise
 
     # Avatar and Media Management
-    def upload_avatar(self, user_id: str, image_data: bytes, filename: str) -> Optional[str]:
-        """Upload user avatar"""
+    def upload_avatar(self, user_id: str, image_data: bytes, filename: str,
+                      background_tasks: Optional[BackgroundTasks] = None) -> Optional[str]:
+        """Upload user avatar
+
+        With background_tasks, the avatar URL is saved and returned right away
+        and the image is resized and uploaded after the response is sent.
+        """
         try:
             if not self.s3_client:
                 logger.warning("S3 client not available, using local storage")
                 return self._upload_avatar_local(user_id, image_data, filename)
             
-            # Process image
-            processed_image = self._process_avatar_image(image_data)
-            
             # Generate S3 key
             file_extension = filename.split('.')[-1].lower()
             s3_key = f"avatars/{user_id}/{uuid.uuid4()}.{file_extension}"
             
-            # Upload to S3
-            self.s3_client.put_object(
-                Bucket=os.getenv('AWS_S3_BUCKET'),
-                Key=s3_key,
-                Body=processed_image,
-                ContentType=f'image/{file_extension}',
-                ACL='public-read'
-            )
+            if background_tasks is not None:
+                background_tasks.add_task(self._process_and_upload_avatar, image_data, s3_key, file_extension)
+            else:
+                self._process_and_upload_avatar(image_data, s3_key, file_extension)
             
             # Generate URL
-            avatar_url = f"https://{os.getenv('AWS_S3_BUCKET')}.s3.amazonaws.com/{s3_key}"
+            avatar_url = f"{self.s3_base_url}/{s3_key}"
             
             # Update profile
             profile = self.get_user_profile(user_id)
@@ -498,9 +541,6 @@ class UserProfileSystemService:
                 profile.avatar_url = avatar_url
                 profile.updated_at = datetime.utcnow()
                 self.db.commit()
-                
-                # Clear cache
-                self.profile_cache.pop(user_id, None)
             
             logger.info(f"Uploaded avatar for user: {user_id}")
             return avatar_url
@@ -509,6 +549,113 @@ class UserProfileSystemService:
             logger.error(f"Error uploading avatar: {str(e)}")
             return None
 
+    def _process_and_upload_avatar(self, image_data: bytes, s3_key: str, file_extension: str) -> None:
+        """Resize an avatar and upload it to S3 under a key chosen beforehand"""
+        try:
+            processed_image = self._process_avatar_image(image_data)
+            
+            self.s3_client.upload_fileobj(
+                BytesIO(processed_image),
+                self.aws_bucket,
+                s3_key,
+                Config=AVATAR_TRANSFER_CONFIG,
+                ExtraArgs={
+                    'ContentType': f'image/{file_extension}',
+                    'ACL': 'public-read'
+                }
+            )
+            
+        except Exception as e:
+            logger.error(f"Error uploading avatar to S3 ({s3_key}): {str(e)}")
+            raise
+
+    def generate_avatar_upload_url(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Create a presigned POST the client can use to send an avatar straight to S3
+
+        The original lands under the user's uploads/ prefix; finalize_avatar
+        turns it into the served avatar. Returns None without S3.
+        """
+        if not self.s3_client:
+            return None
+        
+        try:
+            s3_key = f"avatars/{user_id}/uploads/{uuid.uuid4()}"
+            presigned = self.s3_client.generate_presigned_post(
+                Bucket=self.aws_bucket,
+                Key=s3_key,
+                Conditions=[['content-length-range', 1, AVATAR_MAX_BYTES]],
+                ExpiresIn=AVATAR_UPLOAD_URL_SECONDS
+            )
+            
+            return {
+                "url": presigned["url"],
+                "fields": presigned["fields"],
+                "s3_key": s3_key,
+                "expires_in": AVATAR_UPLOAD_URL_SECONDS
+            }
+            
+        except Exception as e:
+            logger.error(f"Error generating avatar upload URL: {str(e)}")
+            return None
+
+    def finalize_avatar(self, user_id: str, s3_key: str,
+                        background_tasks: Optional[BackgroundTasks] = None) -> Optional[str]:
+        """Point the profile at an avatar uploaded through a presigned POST
+
+        The resized avatar is written under a new key, in the background when
+        background_tasks is given, and the original upload is then removed.
+        """
+        if not s3_key.startswith(f"avatars/{user_id}/uploads/"):
+            raise ValueError("Upload key does not belong to this user")
+        
+        if not self.s3_client:
+            return None
+        
+        try:
+            avatar_key = f"avatars/{user_id}/{uuid.uuid4()}.jpg"
+            
+            if background_tasks is not None:
+                background_tasks.add_task(self._resize_uploaded_avatar, s3_key, avatar_key)
+            else:
+                self._resize_uploaded_avatar(s3_key, avatar_key)
+            
+            avatar_url = f"{self.s3_base_url}/{avatar_key}"
+            
+            profile = self.get_user_profile(user_id)
+            if profile:
+                profile.avatar_url = avatar_url
+                profile.updated_at = datetime.utcnow()
+                self.db.commit()
+            
+            logger.info(f"Finalized avatar upload for user: {user_id}")
+            return avatar_url
+            
+        except Exception as e:
+            logger.error(f"Error finalizing avatar: {str(e)}")
+            return None
+
+    def _resize_uploaded_avatar(self, source_key: str, avatar_key: str) -> None:
+        """Resize an original uploaded to S3 into the served avatar, then delete the original"""
+        try:
+            obj = self.s3_client.get_object(Bucket=self.aws_bucket, Key=source_key)
+            processed_image = self._process_avatar_image(obj['Body'].read())
+            
+            self.s3_client.upload_fileobj(
+                BytesIO(processed_image),
+                self.aws_bucket,
+                avatar_key,
+                Config=AVATAR_TRANSFER_CONFIG,
+                ExtraArgs={
+                    'ContentType': 'image/jpeg',
+                    'ACL': 'public-read'
+                }
+            )
+            self.s3_client.delete_object(Bucket=self.aws_bucket, Key=source_key)
+            
+        except Exception as e:
+            logger.error(f"Error processing uploaded avatar ({source_key}): {str(e)}")
+            raise
+
     def _upload_avatar_local(self, user_id: str, image_data: bytes, filename: str) -> Optional[str]:
         """Upload avatar to local storage"""
         try:
@@ -536,9 +683,6 @@ class UserProfileSystemService:
                 profile.avatar_url = avatar_url
                 profile.updated_at = datetime.utcnow()
                 self.db.commit()
-                
-                # Clear cache
-                self.profile_cache.pop(user_id, None)
             
             return avatar_url
             
@@ -549,20 +693,32 @@ class UserProfileSystemService:
     def _process_avatar_image(self, image_data: bytes) -> bytes:
         """Process avatar image (resize, optimize)"""
         try:
-            # Open image
+            avatar_size = (200, 200)
+            
+            # Open image; for JPEGs, let libjpeg decode at a reduced scale that
+            # still covers twice the avatar size (no-op for other formats)
             image = Image.open(BytesIO(image_data))
             
+            # Opening only reads the header; an upload that is already a small
+            # RGB JPEG is served as-is instead of being decoded and re-encoded
+            if (image.format == 'JPEG' and image.mode == 'RGB'
+                    and image.width <= avatar_size[0] and image.height <= avatar_size[1]
+                    and len(image_data) <= AVATAR_PASSTHROUGH_BYTES):
+                return image_data
+            
+            image.draft('RGB', (avatar_size[0] * 2, avatar_size[1] * 2))
+            
             # Convert to RGB if necessary
             if image.mode != 'RGB':
                 image = image.convert('RGB')
             
-            # Resize to standard avatar size
-            avatar_size = (200, 200)
-            image = image.resize(avatar_size, Image.Resampling.LANCZOS)
+            # Resize to standard avatar size; reducing_gap does a cheap box
+            # reduction first and leaves only the last step to LANCZOS
+            image = image.resize(avatar_size, Image.Resampling.LANCZOS, reducing_gap=2.0)
             
             # Save optimized image
             output = BytesIO()
-            image.save(output, format='JPEG', quality=85, optimize=True)
+            image.save(output, format='JPEG', quality=85, optimize=True, progressive=True)
             
             return output.getvalue()
             
@@ -588,22 +744,11 @@ class UserProfileSystemService:
             completion_percentage = profile.profile_completion_percentage or 0.0
             
             # Identify missing fields
-            missing_fields = []
-            required_fields = {
-                'display_name': 'Display Name',
-                'bio': 'Bio',
-                'location': 'Location',
-                'birth_date': 'Birth Date',
-                'gender': 'Gender',
-                'height': 'Height',
-                'weight': 'Weight',
-                'avatar_url': 'Profile Picture'
-            }
-            
-            for field, display_name in required_fields.items():
-                value = getattr(profile, field)
-                if value is None or value == "":
-                    missing_fields.append(display_name)
+            missing_fields = [
+                display_name
+                for display_name, value in zip(_RECOMMENDED_FIELDS.values(), _get_recommended_fields(profile))
+                if value is None or value == ""
+            ]
             
             # Generate recommendations
             recommendations = self._generate_profile_recommendations(profile, missing_fields)
@@ -707,32 +852,43 @@ class UserProfileSystemService:
 
     # Search and Discovery
     def search_profiles(self, query: str, filters: Dict[str, Any] = None, 
-                       limit: int = 20) -> List[UserProfile]:
-        """Search user profiles"""
+                       limit: int = 20) -> List[Row]:
+        """Search user profiles
+
+        Results are rows of the _PROFILE_CARD_COLUMNS only; use get_profile_by_id
+        for the full profile.
+        """
         try:
             # Base query for searchable profiles
-            base_query = self.db.query(UserProfile).filter(
+            # Each profile has at most one privacy settings row, so the join
+            # cannot duplicate profiles
+            base_query = self.db.query(UserProfile).join(
+                UserPrivacySettings, UserPrivacySettings.profile_id == UserProfile.id
+            ).filter(
                 and_(
                     UserProfile.profile_visibility.in_([
                         ProfileVisibility.PUBLIC, 
                         ProfileVisibility.FRIENDS
                     ]),
                     # Add privacy filter for searchable profiles
-                    UserProfile.id.in_(
-                        self.db.query(UserPrivacySettings.profile_id).filter(
-                            UserPrivacySettings.profile_searchable == True
-                        )
-                    )
+                    UserPrivacySettings.profile_searchable == True
                 )
             )
             
             # Apply search query
             if query:
-                search_filter = or_(
-                    UserProfile.display_name.ilike(f"%{query}%"),
-                    UserProfile.bio.ilike(f"%{query}%"),
-                    UserProfile.location.ilike(f"%{query}%")
-                )
+                if self.db.bind.dialect.name == "postgresql":
+                    # Word matches through the GIN-indexed document instead of
+                    # three substring scans over every profile
+                    search_filter = _profile_search_document().op("@@")(
+                        func.plainto_tsquery("simple", query)
+                    )
+                else:
+                    search_filter = or_(
+                        UserProfile.display_name.ilike(f"%{query}%"),
+                        UserProfile.bio.ilike(f"%{query}%"),
+                        UserProfile.location.ilike(f"%{query}%")
+                    )
                 base_query = base_query.filter(search_filter)
             
             # Apply filters
@@ -758,7 +914,7 @@ class UserProfileSystemService:
                     )
             
             # Order by relevance and completion
-            results = base_query.order_by(
+            results = base_query.with_entities(*_PROFILE_CARD_COLUMNS).order_by(
                 desc(UserProfile.profile_completion_percentage),
                 desc(UserProfile.is_verified),
                 desc(UserProfile.updated_at)
@@ -819,16 +975,14 @@ class UserProfileSystemService:
             if not profile:
                 return False
             
+            now = datetime.utcnow()
             profile.is_verified = True
-            profile.verification_date = datetime.utcnow()
+            profile.verification_date = now
             profile.verification_type = verification_type
-            profile.updated_at = datetime.utcnow()
+            profile.updated_at = now
             
             self.db.commit()
             
-            # Clear cache
-            self.profile_cache.pop(user_id, None)
-            
             logger.info(f"Verified profile for user: {user_id}")
             return True
             
@@ -851,9 +1005,6 @@ class UserProfileSystemService:
             
             self.db.commit()
             
-            # Clear cache
-            self.profile_cache.pop(user_id, None)
-            
             logger.info(f"Unverified profile for user: {user_id}")
             return True
             
@@ -866,31 +1017,39 @@ class UserProfileSystemService:
     def get_profile_statistics(self) -> Dict[str, Any]:
         """Get overall profile statistics"""
         try:
-            total_profiles = self.db.query(UserProfile).count()
-            verified_profiles = self.db.query(UserProfile).filter(
-                UserProfile.is_verified == True
-            ).count()
-            
-            # Average completion percentage
-            avg_completion = self.db.query(
-                func.avg(UserProfile.profile_completion_percentage)
-            ).scalar() or 0.0
+            cached = _statistics_cache.get("profile_statistics")
+            if cached is not None:
+                return cached
             
-            # Profile visibility distribution
+            # One pass over the table, grouped by visibility; the overall
+            # figures are the sums of the (at most three) groups
             visibility_stats = self.db.query(
                 UserProfile.profile_visibility,
-                func.count(UserProfile.id).label('count')
+                func.count(UserProfile.id),
+                func.count(UserProfile.id).filter(UserProfile.is_verified == True),
+                func.sum(UserProfile.profile_completion_percentage),
+                func.count(UserProfile.profile_completion_percentage)
             ).group_by(UserProfile.profile_visibility).all()
             
-            return {
+            total_profiles = sum(row[1] for row in visibility_stats)
+            verified_profiles = sum(row[2] for row in visibility_stats)
+            
+            # Average completion percentage
+            completion_total = sum(row[3] or 0.0 for row in visibility_stats)
+            completion_count = sum(row[4] for row in visibility_stats)
+            avg_completion = completion_total / completion_count if completion_count else 0.0
+            
+            statistics = {
                 "total_profiles": total_profiles,
                 "verified_profiles": verified_profiles,
                 "verification_rate": (verified_profiles / total_profiles * 100) if total_profiles > 0 else 0,
                 "average_completion": round(avg_completion, 2),
                 "visibility_distribution": {
-                    str(visibility): count for visibility, count in visibility_stats
+                    str(visibility): count for visibility, count, *_ in visibility_stats
                 }
             }
+            _statistics_cache.set("profile_statistics", statistics)
+            return statistics
             
         except Exception as e:
             logger.error(f"Error getting profile statistics: {str(e)}")
@@ -901,25 +1060,38 @@ class UserProfileSystemService:
         try:
             cutoff_date = datetime.utcnow() - timedelta(days=days_inactive)
             
-            # Find inactive profiles
-            inactive_profiles = self.db.query(UserProfile).filter(
+            # Find inactive profiles; only their keys are needed
+            inactive_profiles = self.db.query(UserProfile.id, UserProfile.user_id).filter(
                 and_(
                     UserProfile.last_profile_update < cutoff_date,
                     UserProfile.is_verified == False
                 )
             ).all()
             
+            # Delete in IN-list batches within one transaction rather than one
+            # profile (and commit) at a time
             deleted_count = 0
-            for profile in inactive_profiles:
-                try:
-                    self.delete_user_profile(profile.user_id)
-                    deleted_count += 1
-                except Exception as e:
-                    logger.error(f"Error deleting inactive profile {profile.id}: {str(e)}")
+            for start in range(0, len(inactive_profiles), CLEANUP_BATCH_SIZE):
+                profile_ids = [row.id for row in inactive_profiles[start:start + CLEANUP_BATCH_SIZE]]
+                if self.db.bind.dialect.name == "sqlite":
+                    for model in _PROFILE_CHILD_MODELS:
+                        self.db.query(model).filter(model.profile_id.in_(profile_ids)).delete(synchronize_session=False)
+                deleted_count += self.db.query(UserProfile).filter(
+                    UserProfile.id.in_(profile_ids)
+                ).delete(synchronize_session=False)
+            self.db.commit()
+            
+            # Bulk deletes fire no mapper events, so the cache is cleared here
+            _profile_cache.delete(*(
+                key
+                for row in inactive_profiles
+                for key in (f"profile_{row.user_id}", f"preferences_{row.user_id}")
+            ))
             
             logger.info(f"Cleaned up {deleted_count} inactive profiles")
             return deleted_count
             
         except Exception as e:
             logger.error(f"Error cleaning up inactive profiles: {str(e)}")
+            self.db.rollback()
             return 0 
\ No newline at end of file
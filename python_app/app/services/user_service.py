@@ -1,5 +1,6 @@
-from typing import Optional, List, Any
-from sqlalchemy.orm import Session
+from typing import Callable, Optional, List, Any
+from sqlalchemy import and_, case, event, func, inspect, or_
+from sqlalchemy.orm import Session, object_session
 import logging
 import os
 from pathlib import Path
@@ -10,6 +11,7 @@ from app.models.user import (
     User, UserCreate, UserUpdate, UserProfile, UserProfileUpdate, UserRole, UserPreferences
 )
 from app.core.auth import AuthManager
+from app.core.cache import TTLCache, attach_cached, cache_row, invalidate_on_commit
 from app.core.security import get_password_hash, verify_password
 from app.services.base_service import BaseService
 from app.schemas.user import UserPreferencesUpdate
@@ -20,6 +22,44 @@ logger = logging.getLogger(__name__)
 
 AVATAR_DIR = Path("static/avatars")
 AVATAR_DIR.mkdir(parents=True, exist_ok=True)
+AVATAR_EXTENSIONS = ("png", "jpg", "jpeg", "gif")
+
+# Daily streak records returned as a user's recent history
+STREAK_HISTORY_DAYS = 30
+
+# Which extension a user's avatar file has; cleared by delete_avatar
+AVATAR_PATH_CACHE_SECONDS = 60
+_avatar_path_cache = TTLCache(seconds=AVATAR_PATH_CACHE_SECONDS, maxsize=4096)
+
+# Users and profiles are read on most requests and change rarely. Entries hold
+# column values rather than instances, since instances belong to one session.
+USER_CACHE_SECONDS = 300
+_user_cache = TTLCache(seconds=USER_CACHE_SECONDS, maxsize=10000)
+
+# Callbacks run with a user's ID once a change to that user is committed,
+# for other services that cache user data; see UserService.add_change_listener
+_user_change_listeners: List[Callable[[int], None]] = []
+
+def _notify_user_changed(*user_ids: int):
+    for user_id in user_ids:
+        for listener in _user_change_listeners:
+            listener(user_id)
+
+def _invalidate_cached_user(mapper, connection, target):
+    # A username change must also drop the lookup under the old name
+    usernames = {target.username, *inspect(target).attrs.username.history.deleted}
+    db = object_session(target)
+    invalidate_on_commit(db, _user_cache.delete, f"user_{target.id}", *(f"username_{username}" for username in usernames))
+    invalidate_on_commit(db, _notify_user_changed, target.id)
+
+def _invalidate_cached_user_profile(mapper, connection, target):
+    invalidate_on_commit(object_session(target), _user_cache.delete, f"user_profile_{target.user_id}")
+
+# Any flushed change to a cached row drops its entry, whichever code path
+# made it. Core UPDATEs fire no mapper events; see forget_cached_users.
+for _event_name in ('after_update', 'after_delete'):
+    event.listen(User, _event_name, _invalidate_cached_user)
+    event.listen(UserProfile, _event_name, _invalidate_cached_user_profile)
 
 class UserService(BaseService[User, UserCreate, UserProfileUpdate]):
     """Service for user management operations using a database."""
@@ -28,14 +68,20 @@ class UserService(BaseService[User, UserCreate, UserProfileUpdate]):
         return db.query(User).filter(User.email == email).first()
 
     def create(self, db: Session, *, obj_in: UserCreate) -> User:
-        """Create a new user and a default profile."""
-        if db.query(User).filter(User.email == obj_in.email).first():
+        """Create a new user with a default profile and preferences."""
+        # One lookup covers both unique fields
+        taken = db.query(User.email, User.username).filter(
+            or_(User.email == obj_in.email, User.username == obj_in.username)
+        ).all()
+        if any(row.email == obj_in.email for row in taken):
             raise ValueError("Email already registered")
-        if db.query(User).filter(User.username == obj_in.username).first():
+        if taken:
             raise ValueError("Username already taken")
 
         hashed_password = get_password_hash(obj_in.password)
         
+        # The user, its default profile and its default preferences are
+        # written in one transaction
         db_user = User(
             email=obj_in.email,
             username=obj_in.username,
@@ -43,25 +89,16 @@ class UserService(BaseService[User, UserCreate, UserProfileUpdate]):
             full_name=obj_in.full_name,
             is_active=True,  # Users are active by default
             is_verified=False, # Email verification is required
+            profile=UserProfile(),
         )
         db.add(db_user)
+        db.flush()  # Preferences reference the new user's ID
+        db.add(UserPreferences(user_id=db_user.id))
         db.commit()
         db.refresh(db_user)
         
-        # Create a default profile
-        self._create_default_profile(db, db_user.id)
-        
-        # Create default preferences
-        self.get_or_create_preferences(db, user_id=db_user.id)
-        
         return db_user
 
-    def _create_default_profile(self, db: Session, user_id: int):
-        """Create a default profile for a new user."""
-        db_profile = db_models.UserProfile(user_id=user_id)
-        db.add(db_profile)
-        db.commit()
-
     def authenticate(self, db: Session, *, email: str, password: str) -> Optional[User]:
         """Authenticate user with email and password."""
         user = self.get_by_email(db, email=email)
@@ -73,11 +110,36 @@ class UserService(BaseService[User, UserCreate, UserProfileUpdate]):
 
     def get_user_by_id(self, db: Session, user_id: int) -> Optional[User]:
         """Get user by ID."""
-        return db.query(User).filter(User.id == user_id).first()
+        cached = _user_cache.get(f"user_{user_id}")
+        if cached is not None:
+            return attach_cached(db, User, cached)
+
+        user = db.query(User).filter(User.id == user_id).first()
+        if user:
+            _user_cache.set(f"user_{user_id}", cache_row(user))
+        return user
+
+    def forget_cached_users(self, db: Session, user_ids) -> None:
+        """Drop cached users once db commits, for changes made with Core
+        UPDATE statements, which bypass the mapper events above."""
+        invalidate_on_commit(db, _user_cache.delete, *(f"user_{user_id}" for user_id in user_ids))
+        invalidate_on_commit(db, _notify_user_changed, *user_ids)
+
+    def add_change_listener(self, listener: Callable[[int], None]) -> None:
+        """Call listener with a user's ID whenever a change to them is committed."""
+        _user_change_listeners.append(listener)
 
     def get_user_by_username(self, db: Session, username: str) -> Optional[User]:
         """Get user by username."""
-        return db.query(User).filter(User.username == username).first()
+        user_id = _user_cache.get(f"username_{username}")
+        if user_id is not None:
+            return self.get_user_by_id(db, user_id)
+
+        user = db.query(User).filter(User.username == username).first()
+        if user:
+            _user_cache.set(f"username_{username}", user.id)
+            _user_cache.set(f"user_{user.id}", cache_row(user))
+        return user
 
     def update_profile(self, db: Session, *, db_obj: User, obj_in: UserProfileUpdate) -> User:
         """Update user profile."""
@@ -134,7 +196,14 @@ class UserService(BaseService[User, UserCreate, UserProfileUpdate]):
 
     def get_user_profile(self, db: Session, user_id: int) -> Optional[db_models.UserProfile]:
         """Get user profile by user ID."""
-        return db.query(db_models.UserProfile).filter(db_models.UserProfile.user_id == user_id).first()
+        cached = _user_cache.get(f"user_profile_{user_id}")
+        if cached is not None:
+            return attach_cached(db, UserProfile, cached)
+
+        profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
+        if profile:
+            _user_cache.set(f"user_profile_{user_id}", cache_row(profile))
+        return profile
 
     def set_avatar_filename(self, db: Session, *, user: User, filename: str) -> User:
         user.avatar_url = filename
@@ -143,18 +212,39 @@ class UserService(BaseService[User, UserCreate, UserProfileUpdate]):
         db.refresh(user)
         return user
 
-    def get_avatar_path(self, user_id: int) -> Optional[Path]:
-        # This is a simplified example; in a real app, you'd query the user model
-        # to get the avatar filename. For now, we find the first match.
-        for ext in ["png", "jpg", "jpeg", "gif"]:
-            avatar_path = AVATAR_DIR / f"{user_id}.{ext}"
-            if avatar_path.exists():
-                return avatar_path
-        return None
+    def get_avatar_path(self, user_id: int, filename: Optional[str] = None) -> Optional[Path]:
+        """Path of a user's avatar file, if there is one.
+
+        filename is the stored avatar filename or URL (e.g. the profile's
+        profile_picture_url); with it only that file is checked. Without it
+        each extension is tried, and the outcome is remembered for a while.
+        """
+        if filename:
+            avatar_path = AVATAR_DIR / os.path.basename(filename)
+            return avatar_path if avatar_path.exists() else None
+
+        cache_key = f"avatar_path_{user_id}"
+        cached = _avatar_path_cache.get(cache_key)
+        if cached is not None:
+            return cached or None
+
+        avatar_path = self._find_avatar_file(user_id)
+        # False marks a known miss, since get() returns None for absent keys
+        _avatar_path_cache.set(cache_key, avatar_path or False)
+        return avatar_path
+
+    def _find_avatar_file(self, user_id: int) -> Optional[Path]:
+        """The user's avatar file under any of AVATAR_EXTENSIONS, checked on disk"""
+        return next(
+            (path for path in (AVATAR_DIR / f"{user_id}.{ext}" for ext in AVATAR_EXTENSIONS) if path.exists()),
+            None
+        )
 
     def delete_avatar(self, user_id: int) -> bool:
-        avatar_path = self.get_avatar_path(user_id)
-        if avatar_path:
+        # A remembered miss may predate the upload, so the cache is bypassed
+        avatar_path = self._find_avatar_file(user_id)
+        _avatar_path_cache.delete(f"avatar_path_{user_id}")
+        if avatar_path and avatar_path.exists():
             os.remove(avatar_path)
             # You would also clear the avatar_url in the user model here
             return True
@@ -199,9 +289,16 @@ class UserService(BaseService[User, UserCreate, UserProfileUpdate]):
         logger.info(f"Successfully deleted account and all associated data for user_id: {user_id}")
         return True
 
-    def get_all_users(self, db: Session, skip: int = 0, limit: int = 100) -> List[User]:
-        """Get all users with pagination."""
-        return db.query(User).offset(skip).limit(limit).all()
+    def get_all_users(self, db: Session, skip: int = 0, limit: int = 100, after_id: Optional[int] = None) -> List[User]:
+        """Get all users with pagination, ordered by ID.
+
+        Pass the last ID of the previous page as after_id to seek straight to
+        the next page instead of skipping over every earlier row.
+        """
+        query = db.query(User)
+        if after_id is not None:
+            query = query.filter(User.id > after_id)
+        return query.order_by(User.id).offset(skip).limit(limit).all()
 
     def get_user_count(self, db: Session) -> int:
         """Get the total number of users."""
@@ -297,19 +394,24 @@ class UserService(BaseService[User, UserCreate, UserProfileUpdate]):
         """
         Update the streak_day field for all daily streak records for a user.
         """
-        streaks = db.query(db_models.DailyStreak).filter(
-            db_models.DailyStreak.user_id == user_id
-        ).order_by(db_models.DailyStreak.date).all()
+        # Only the columns the calculation needs, not full objects
+        streaks = db.query(
+            db_models.DailyStreak.id, db_models.DailyStreak.goal_met, db_models.DailyStreak.streak_day
+        ).filter(db_models.DailyStreak.user_id == user_id).order_by(db_models.DailyStreak.date).all()
 
+        changed_days = {}
         current_streak = 0
         for streak in streaks:
-            if streak.goal_met:
-                current_streak += 1
-                streak.streak_day = current_streak
-            else:
-                current_streak = 0
-                streak.streak_day = 0
-
+            current_streak = current_streak + 1 if streak.goal_met else 0
+            if streak.streak_day != current_streak:
+                changed_days[streak.id] = current_streak
+
+        # Rows whose streak_day changed are rewritten by one UPDATE ... CASE
+        if changed_days:
+            db.query(db_models.DailyStreak).filter(db_models.DailyStreak.id.in_(changed_days)).update(
+                {db_models.DailyStreak.streak_day: case(changed_days, value=db_models.DailyStreak.id)},
+                synchronize_session=False
+            )
         db.commit()
 
     def get_streak_summary(self, db: Session, user_id: int) -> StreakSummary:
@@ -320,36 +422,38 @@ class UserService(BaseService[User, UserCreate, UserProfileUpdate]):
         if not user_profile:
             return None
 
-        # Get all daily streaks
-        daily_streaks = db.query(db_models.DailyStreak).filter(
-            db_models.DailyStreak.user_id == user_id
-        ).order_by(db_models.DailyStreak.date.desc()).all()
-
-        # Calculate current streak
-        current_streak = 0
         today = date.today()
-        check_date = today
-        
-        for streak in daily_streaks:
-            if streak.date == check_date and streak.goal_met:
-                current_streak += 1
-                check_date -= timedelta(days=1)
-            else:
-                break
-
-        # Calculate total streak days
-        total_streak_days = len([s for s in daily_streaks if s.goal_met])
+        week_start = today - timedelta(days=7)
+        goal_met = db_models.DailyStreak.goal_met == True
 
-        # Get last streak date
-        last_streak_date = None
-        for streak in daily_streaks:
-            if streak.goal_met:
-                last_streak_date = streak.date
-                break
+        # Totals are aggregated in the database instead of loading the whole history
+        total_streak_days, last_streak_date, recent_days, recent_goal_days = db.query(
+            func.count().filter(goal_met),
+            func.max(db_models.DailyStreak.date).filter(goal_met),
+            func.count().filter(db_models.DailyStreak.date >= week_start),
+            func.count().filter(and_(goal_met, db_models.DailyStreak.date >= week_start)),
+        ).filter(db_models.DailyStreak.user_id == user_id).one()
 
         # Calculate current streak percentage (last 7 days)
-        recent_streaks = [s for s in daily_streaks if s.date >= today - timedelta(days=7)]
-        current_streak_percentage = (len([s for s in recent_streaks if s.goal_met]) / 7) * 100 if recent_streaks else 0.0
+        current_streak_percentage = (recent_goal_days / 7) * 100 if recent_days else 0.0
+
+        streak_history = self.get_daily_streaks(db, user_id, limit=STREAK_HISTORY_DAYS)
+
+        # Calculate current streak, reading further back only while it continues
+        current_streak = 0
+        check_date = today
+        page = streak_history
+        while page:
+            for streak in page:
+                if streak.date == check_date and streak.goal_met:
+                    current_streak += 1
+                    check_date -= timedelta(days=1)
+                else:
+                    break
+            else:
+                page = self.get_daily_streaks(db, user_id, limit=STREAK_HISTORY_DAYS, before=page[-1].date)
+                continue
+            break
 
         return StreakSummary(
             current_streak=current_streak,
@@ -357,26 +461,56 @@ class UserService(BaseService[User, UserCreate, UserProfileUpdate]):
             total_streak_days=total_streak_days,
             last_streak_date=last_streak_date,
             current_streak_percentage=current_streak_percentage,
-            streak_history=daily_streaks[:30]  # Last 30 days
+            streak_history=streak_history
         )
 
-    def get_daily_streaks(self, db: Session, user_id: int, limit: int = 30) -> List[db_models.DailyStreak]:
+    def get_daily_streaks(self, db: Session, user_id: int, limit: int = 30,
+                          before: Optional[datetime] = None) -> List[db_models.DailyStreak]:
         """
-        Get daily streak records for a user.
+        Get daily streak records for a user, newest first.
+
+        Pass the date of the last record of the previous page as before to
+        get the page that follows it.
         """
-        return db.query(db_models.DailyStreak).filter(
+        query = db.query(db_models.DailyStreak).filter(
             db_models.DailyStreak.user_id == user_id
-        ).order_by(db_models.DailyStreak.date.desc()).limit(limit).all()
+        )
+        if before is not None:
+            query = query.filter(db_models.DailyStreak.date < before)
+        return query.order_by(db_models.DailyStreak.date.desc()).limit(limit).all()
 
     def get_streak_stats(self, db: Session, user_id: int) -> dict:
         """
         Get detailed streak statistics for a user.
         """
-        streaks = db.query(db_models.DailyStreak).filter(
-            db_models.DailyStreak.user_id == user_id
-        ).order_by(db_models.DailyStreak.date).all()
-
-        if not streaks:
+        # Gaps and islands: numbering each day by the misses up to and
+        # including it gives every run of met goals (plus the miss that
+        # starts it) its own island number
+        days = db.query(
+            db_models.DailyStreak.goal_met,
+            db_models.DailyStreak.percentage_completed,
+            func.sum(case((db_models.DailyStreak.goal_met == True, 0), else_=1)).over(
+                order_by=db_models.DailyStreak.date
+            ).label("island")
+        ).filter(db_models.DailyStreak.user_id == user_id).subquery()
+
+        islands = db.query(
+            func.count().label("days"),
+            func.count().filter(days.c.goal_met == True).label("streak"),
+            func.sum(days.c.percentage_completed).label("completion"),
+            (days.c.island == func.max(days.c.island).over()).label("is_latest")
+        ).group_by(days.c.island).subquery()
+
+        # The latest island's run is the current streak
+        total_days, successful_days, total_completion, longest_streak, current_streak = db.query(
+            func.sum(islands.c.days),
+            func.sum(islands.c.streak),
+            func.sum(islands.c.completion),
+            func.max(islands.c.streak),
+            func.max(case((islands.c.is_latest, islands.c.streak), else_=0))
+        ).one()
+
+        if not total_days:
             return {
                 "total_days": 0,
                 "successful_days": 0,
@@ -386,34 +520,13 @@ class UserService(BaseService[User, UserCreate, UserProfileUpdate]):
                 "current_streak": 0
             }
 
-        total_days = len(streaks)
-        successful_days = len([s for s in streaks if s.goal_met])
-        success_rate = (successful_days / total_days) * 100 if total_days > 0 else 0.0
-        average_completion = sum(s.percentage_completed for s in streaks) / total_days if total_days > 0 else 0.0
-
-        # Calculate longest streak
-        longest_streak = 0
-        current_streak_count = 0
-        for streak in streaks:
-            if streak.goal_met:
-                current_streak_count += 1
-                longest_streak = max(longest_streak, current_streak_count)
-            else:
-                current_streak_count = 0
-
-        # Calculate current streak
-        current_streak = 0
-        for streak in reversed(streaks):
-            if streak.goal_met:
-                current_streak += 1
-            else:
-                break
-
+        # PostgreSQL sums counts as NUMERIC
+        total_days, successful_days = int(total_days), int(successful_days)
         return {
             "total_days": total_days,
             "successful_days": successful_days,
-            "success_rate": success_rate,
-            "average_completion": average_completion,
+            "success_rate": (successful_days / total_days) * 100,
+            "average_completion": float(total_completion or 0.0) / total_days,
             "longest_streak": longest_streak,
             "current_streak": current_streak
         }
@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
+import asyncio
 import random
 
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -23,6 +24,10 @@ from app.models.visualization_system import (
     DataPoint
 )
 
+def _days_between(start_date: datetime, end_date: datetime) -> List[datetime]:
+    """start_date and each following day up to and including end_date"""
+    return [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+
 class VisualizationSystemService:
     def __init__(self, db: AsyncSession):
         self.db = db
@@ -31,11 +36,15 @@ class VisualizationSystemService:
         """
         Generates all the data needed for a user's main hydration dashboard.
         """
-        # In a real application, these would likely be parallel async calls
-        hydration_ts = await self._get_hydration_over_time(user_id, start_date, end_date)
-        drink_dist = await self._get_drink_type_distribution(user_id, start_date, end_date)
-        daily_comp = await self._get_daily_intake_comparison(user_id, start_date, end_date)
-        score = await self._get_overall_hydration_score(user_id, start_date, end_date)
+        # The four charts are independent, so they are built concurrently.
+        # An AsyncSession cannot run statements concurrently; a chart that
+        # starts querying self.db needs a session of its own.
+        hydration_ts, drink_dist, daily_comp, score = await asyncio.gather(
+            self._get_hydration_over_time(user_id, start_date, end_date),
+            self._get_drink_type_distribution(user_id, start_date, end_date),
+            self._get_daily_intake_comparison(user_id, start_date, end_date),
+            self._get_overall_hydration_score(user_id, start_date, end_date)
+        )
         
         return HydrationDashboard(
             hydration_over_time=HydrationVsTimeData(data=hydration_ts),
@@ -65,14 +74,12 @@ class VisualizationSystemService:
         # data_points = [DataPoint(x=row[0], y=row[1]) for row in results]
         
         # --- Simulated Data ---
-        simulated_points = []
-        current_date = start_date
-        while current_date <= end_date:
-            simulated_points.append(DataPoint(
-                x=current_date.strftime("%Y-%m-%d"),
-                y=random.randint(1500, 3000)
-            ))
-            current_date += timedelta(days=1)
+        days = _days_between(start_date, end_date)
+        amounts = random.choices(range(1500, 3001), k=len(days))
+        simulated_points = [
+            DataPoint(x=day.strftime("%Y-%m-%d"), y=amount)
+            for day, amount in zip(days, amounts)
+        ]
 
         dataset = DataSet(label="Hydration (ml)", data=simulated_points, color="#3498db")
         return TimeSeriesData(datasets=[dataset], y_axis_label="Milliliters (ml)")
@@ -95,16 +102,12 @@ class VisualizationSystemService:
         """
         Generates bar chart data comparing daily intake to a goal.
         """
-        labels = []
-        intake_data = []
-        goal_data = []
-        
-        current_date = start_date
-        while current_date <= end_date:
-            labels.append(current_date.strftime("%a")) # e.g., "Mon"
-            intake_data.append(DataPoint(x=current_date.strftime("%a"), y=random.randint(1500, 3500)))
-            goal_data.append(DataPoint(x=current_date.strftime("%a"), y=3000)) # Assume a static goal
-            current_date += timedelta(days=1)
+        labels = [day.strftime("%a") for day in _days_between(start_date, end_date)] # e.g., "Mon"
+        intake_data = [
+            DataPoint(x=label, y=amount)
+            for label, amount in zip(labels, random.choices(range(1500, 3501), k=len(labels)))
+        ]
+        goal_data = [DataPoint(x=label, y=3000) for label in labels] # Assume a static goal
             
         return BarChartData(
             labels=labels,
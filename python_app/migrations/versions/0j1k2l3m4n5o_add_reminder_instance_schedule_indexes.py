@@ -0,0 +1,45 @@
+"""Add reminder instance schedule indexes
+
+Revision ID: 0j1k2l3m4n5o
+Revises: 9i0j1k2l3m4n
+Create Date: 2024-01-16 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0j1k2l3m4n5o'
+down_revision = '9i0j1k2l3m4n'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Partial and INCLUDE indexes are only worth it on PostgreSQL; SQLite
+    # deployments keep scanning, as with the other index migrations
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # Scheduling conflict checks probe each of a user's reminders for
+    # undelivered instances in a scheduled_time range
+    op.create_index(
+        'ix_reminder_inst_pending_by_reminder', 'reminder_instances',
+        ['reminder_id', 'scheduled_time'], unique=False,
+        postgresql_include=['id', 'delivery_method'],
+        postgresql_where=sa.text("delivery_status = 'pending'")
+    )
+    # Sending due reminders only ever looks at undelivered instances
+    op.create_index(
+        'ix_reminder_inst_pending', 'reminder_instances',
+        ['scheduled_time'], unique=False,
+        postgresql_where=sa.text("delivery_status = 'pending'")
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.drop_index('ix_reminder_inst_pending', table_name='reminder_instances')
+    op.drop_index('ix_reminder_inst_pending_by_reminder', table_name='reminder_instances')
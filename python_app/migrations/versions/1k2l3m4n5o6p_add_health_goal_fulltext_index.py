@@ -0,0 +1,40 @@
+"""Add full-text index for health goal search
+
+Revision ID: 1k2l3m4n5o6p
+Revises: 0j1k2l3m4n5o
+Create Date: 2024-01-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '1k2l3m4n5o6p'
+down_revision = '0j1k2l3m4n5o'
+branch_labels = None
+depends_on = None
+
+# Must stay in sync with the tsvector expression built in
+# app/services/search_system_service.py, otherwise the planner ignores the index
+HEALTH_GOAL_DOCUMENT = (
+    "to_tsvector('english', coalesce(name, '') || ' ' || coalesce(description, ''))"
+)
+
+
+def upgrade():
+    # tsvector is PostgreSQL-only; SQLite deployments keep the ILIKE search
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.create_index(
+        'ix_health_goals_search_tsv', 'health_goals',
+        [sa.text(HEALTH_GOAL_DOCUMENT)], unique=False,
+        postgresql_using='gin'
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.drop_index('ix_health_goals_search_tsv', table_name='health_goals')
@@ -0,0 +1,35 @@
+"""Add prefix index for search suggestions
+
+Revision ID: 2l3m4n5o6p7q
+Revises: 1k2l3m4n5o6p
+Create Date: 2024-01-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2l3m4n5o6p7q'
+down_revision = '1k2l3m4n5o6p'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # text_pattern_ops is PostgreSQL-only; it lets a btree serve LIKE 'prefix%'
+    # regardless of the database collation
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.create_index(
+        'ix_search_analytics_query_prefix', 'search_analytics',
+        [sa.text('lower(query_text) text_pattern_ops'), sa.text('search_frequency DESC')],
+        unique=False
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.drop_index('ix_search_analytics_query_prefix', table_name='search_analytics')
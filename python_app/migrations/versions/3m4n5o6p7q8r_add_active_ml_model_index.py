@@ -0,0 +1,30 @@
+"""Add partial index for active ML model lookup
+
+Revision ID: 3m4n5o6p7q8r
+Revises: 2l3m4n5o6p7q
+Create Date: 2024-01-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '3m4n5o6p7q8r'
+down_revision = '2l3m4n5o6p7q'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # get_active_ml_model wants the newest active version of a type; only the
+    # few active models are indexed, already in the order it reads them
+    op.create_index(
+        'ix_ml_models_active', 'ml_models',
+        ['model_type', sa.text('version DESC')], unique=False,
+        postgresql_where=sa.text('is_active'),
+        sqlite_where=sa.text('is_active')
+    )
+
+
+def downgrade():
+    op.drop_index('ix_ml_models_active', table_name='ml_models')
@@ -0,0 +1,38 @@
+"""Add friend pairs for mutual follow lookups
+
+Revision ID: 4n5o6p7q8r9s
+Revises: 3m4n5o6p7q8r
+Create Date: 2024-01-20 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '4n5o6p7q8r9s'
+down_revision = '3m4n5o6p7q8r'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('friend_pairs',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('friend_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['friend_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'friend_id')
+    )
+
+    # Backfill from existing mutual follows; each pair yields both directions
+    op.execute(
+        "INSERT INTO friend_pairs (user_id, friend_id, created_at) "
+        "SELECT a.follower_id, a.following_id, CURRENT_TIMESTAMP "
+        "FROM user_follows a "
+        "JOIN user_follows b ON b.follower_id = a.following_id AND b.following_id = a.follower_id"
+    )
+
+
+def downgrade():
+    op.drop_table('friend_pairs')
@@ -0,0 +1,44 @@
+"""Add timeline entries for fanned-out activity feeds
+
+Revision ID: 5o6p7q8r9s0t
+Revises: 4n5o6p7q8r9s
+Create Date: 2024-01-21 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '5o6p7q8r9s0t'
+down_revision = '4n5o6p7q8r9s'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('timeline_entries',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('activity_id', sa.Integer(), nullable=False),
+        sa.Column('author_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['activity_id'], ['activities.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['author_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'activity_id')
+    )
+    op.create_index('ix_timeline_entries_user_created', 'timeline_entries', ['user_id', 'created_at'], unique=False)
+
+    # Backfill: every activity goes to its author and to each of the author's followers
+    op.execute(
+        "INSERT INTO timeline_entries (user_id, activity_id, author_id, created_at) "
+        "SELECT a.user_id, a.id, a.user_id, COALESCE(a.created_at, CURRENT_TIMESTAMP) "
+        "FROM activities a "
+        "UNION ALL "
+        "SELECT f.follower_id, a.id, a.user_id, COALESCE(a.created_at, CURRENT_TIMESTAMP) "
+        "FROM activities a JOIN user_follows f ON f.following_id = a.user_id"
+    )
+
+
+def downgrade():
+    op.drop_index('ix_timeline_entries_user_created', table_name='timeline_entries')
+    op.drop_table('timeline_entries')
@@ -0,0 +1,35 @@
+"""Add follow and activity feed indexes
+
+Revision ID: 6p7q8r9s0t1u
+Revises: 5o6p7q8r9s0t
+Create Date: 2024-01-22 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '6p7q8r9s0t1u'
+down_revision = '5o6p7q8r9s0t'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The (follower_id, following_id) primary key already enforces uniqueness
+    # and serves lookups by follower; followers-of queries need the reverse
+    op.create_index(
+        'ix_user_follows_following_follower', 'user_follows',
+        ['following_id', 'follower_id'], unique=False
+    )
+    # Feeds filter on the author and read newest first, so the LIMIT is
+    # served by walking the index instead of sorting
+    op.create_index(
+        'ix_activity_user_created', 'activities',
+        ['user_id', sa.text('created_at DESC')], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('ix_activity_user_created', table_name='activities')
+    op.drop_index('ix_user_follows_following_follower', table_name='user_follows')
@@ -0,0 +1,32 @@
+"""Add follower and following counters to users
+
+Revision ID: 7q8r9s0t1u2v
+Revises: 6p7q8r9s0t1u
+Create Date: 2024-01-23 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '7q8r9s0t1u2v'
+down_revision = '6p7q8r9s0t1u'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('users', sa.Column('followers_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('users', sa.Column('following_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Seed the counters from the existing follow graph
+    op.execute(
+        "UPDATE users SET "
+        "followers_count = (SELECT COUNT(*) FROM user_follows WHERE user_follows.following_id = users.id), "
+        "following_count = (SELECT COUNT(*) FROM user_follows WHERE user_follows.follower_id = users.id)"
+    )
+
+
+def downgrade():
+    op.drop_column('users', 'following_count')
+    op.drop_column('users', 'followers_count')
@@ -0,0 +1,35 @@
+"""Allow one pending friend request per pair
+
+Revision ID: 8r9s0t1u2v3w
+Revises: 7q8r9s0t1u2v
+Create Date: 2024-01-24 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '8r9s0t1u2v3w'
+down_revision = '7q8r9s0t1u2v'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keep the oldest of any duplicate pending requests so the index can be built
+    op.execute(
+        "DELETE FROM friend_requests WHERE status = 'pending' AND id NOT IN ("
+        "SELECT MIN(id) FROM friend_requests WHERE status = 'pending' "
+        "GROUP BY requester_id, addressee_id)"
+    )
+    # Partial, so the same pair may have any number of answered requests
+    op.create_index(
+        'uq_friend_requests_pending', 'friend_requests',
+        ['requester_id', 'addressee_id'], unique=True,
+        postgresql_where=sa.text("status = 'pending'"),
+        sqlite_where=sa.text("status = 'pending'")
+    )
+
+
+def downgrade():
+    op.drop_index('uq_friend_requests_pending', table_name='friend_requests')
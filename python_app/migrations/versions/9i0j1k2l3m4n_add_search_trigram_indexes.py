@@ -0,0 +1,47 @@
+"""Add trigram indexes for federated search
+
+Revision ID: 9i0j1k2l3m4n
+Revises: 8h9i0j1k2l3m
+Create Date: 2024-01-15 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '9i0j1k2l3m4n'
+down_revision = '8h9i0j1k2l3m'
+branch_labels = None
+depends_on = None
+
+# Columns matched with ILIKE '%term%' by the federated search. A btree index
+# cannot serve a leading wildcard, a pg_trgm GIN index can.
+TRIGRAM_INDEXES = [
+    ('ix_users_username_trgm', 'users', 'username'),
+    ('ix_users_email_trgm', 'users', 'email'),
+    ('ix_drink_types_name_trgm', 'drink_types', 'name'),
+    ('ix_health_goals_name_trgm', 'health_goals', 'name'),
+    ('ix_health_goals_description_trgm', 'health_goals', 'description'),
+]
+
+
+def upgrade():
+    # pg_trgm is PostgreSQL-only; SQLite deployments keep scanning
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for index_name, table_name, column_name in TRIGRAM_INDEXES:
+        op.create_index(
+            index_name, table_name, [column_name], unique=False,
+            postgresql_using='gin',
+            postgresql_ops={column_name: 'gin_trgm_ops'}
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    for index_name, table_name, _ in reversed(TRIGRAM_INDEXES):
+        op.drop_index(index_name, table_name=table_name)
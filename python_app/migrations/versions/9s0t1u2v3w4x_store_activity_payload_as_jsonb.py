@@ -0,0 +1,41 @@
+"""Store the full activity payload as non-null JSONB
+
+Revision ID: 9s0t1u2v3w4x
+Revises: 8r9s0t1u2v3w
+Create Date: 2024-01-25 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+# revision identifiers, used by Alembic.
+revision = '9s0t1u2v3w4x'
+down_revision = '8r9s0t1u2v3w'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("UPDATE activities SET data = '{}' WHERE data IS NULL")
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.alter_column(
+            'activities', 'data', type_=JSONB(), existing_type=sa.JSON(),
+            nullable=False, server_default='{}', postgresql_using='data::jsonb'
+        )
+    else:
+        # SQLite cannot alter a column in place; batch mode rebuilds the table
+        with op.batch_alter_table('activities') as batch_op:
+            batch_op.alter_column('data', existing_type=sa.JSON(), nullable=False, server_default='{}')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.alter_column(
+            'activities', 'data', type_=sa.JSON(), existing_type=JSONB(),
+            nullable=True, server_default=None, postgresql_using='data::json'
+        )
+    else:
+        with op.batch_alter_table('activities') as batch_op:
+            batch_op.alter_column('data', existing_type=sa.JSON(), nullable=True, server_default=None)
@@ -0,0 +1,67 @@
+import pytest
+from app.core.cache import TTLCache, async_timed_lru_cache
+
+def test_ttl_cache_entries_expire():
+    cache = TTLCache(seconds=0)
+    cache.set("key", "value")
+    assert cache.get("key") is None
+    assert cache.get("key", "default") == "default"
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(seconds=60, maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+def test_ttl_cache_delete():
+    cache = TTLCache(seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.delete("a", "missing")
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+def _counting(seconds, maxsize=128):
+    calls = []
+    @async_timed_lru_cache(seconds, maxsize)
+    async def lookup(value):
+        calls.append(value)
+        return None if value == 0 else value * 10
+    return lookup, calls
+
+@pytest.mark.asyncio
+async def test_async_cache_reuses_results_until_they_expire():
+    lookup, calls = _counting(seconds=60)
+    assert await lookup(1) == 10
+    assert await lookup(1) == 10
+    assert calls == [1]
+
+    expiring, expiring_calls = _counting(seconds=0)
+    await expiring(1)
+    await expiring(1)
+    assert expiring_calls == [1, 1]
+
+@pytest.mark.asyncio
+async def test_async_cache_evicts_least_recently_used():
+    lookup, calls = _counting(seconds=60, maxsize=2)
+    await lookup(1)
+    await lookup(2)
+    await lookup(1)  # 2 is now the least recently used
+    await lookup(3)
+    await lookup(1)
+    await lookup(2)
+    assert calls == [1, 2, 3, 2]
+
+@pytest.mark.asyncio
+async def test_async_cache_skips_none_and_can_invalidate():
+    lookup, calls = _counting(seconds=60)
+    assert await lookup(0) is None
+    assert await lookup(0) is None
+    await lookup(1)
+    lookup.cache_invalidate(1)
+    await lookup(1)
+    assert calls == [0, 0, 1, 1]
@@ -0,0 +1,98 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from app.services.review_service import ReviewService
+from app.models.review import ReviewCreate, ReviewUpdate, ReviewModeration, ReviewStatus
+
+async def _fake_user(user_id):
+    return SimpleNamespace(id=user_id, username=f"user{user_id}", is_verified=False)
+
+async def _fake_water(water_id):
+    return SimpleNamespace(id=water_id, name=f"Water {water_id}", brand=None)
+
+@pytest.fixture
+def review_service(tmp_path):
+    service = ReviewService()
+    service.reviews_file = tmp_path / "reviews.json"
+    service.votes_file = tmp_path / "review_votes.json"
+    service.flags_file = tmp_path / "review_flags.json"
+    service._ensure_data_files()
+    service._get_user = _fake_user
+    service._get_water = _fake_water
+    return service
+
+def _review(water_id, rating, **kwargs):
+    return ReviewCreate(water_id=water_id, rating=rating, title="Title", comment="A comment", **kwargs)
+
+@pytest.mark.asyncio
+async def test_concurrent_mutations_share_one_write(review_service):
+    serialize = review_service._serialize_reviews
+    writes = []
+    def counting_serialize():
+        writes.append(1)
+        return serialize()
+    review_service._serialize_reviews = counting_serialize
+
+    await asyncio.gather(*(review_service.create_review(user_id, _review(1, 4)) for user_id in range(1, 6)))
+
+    assert len(writes) == 1
+    reloaded = ReviewService()
+    reloaded.reviews_file = review_service.reviews_file
+    assert sorted(review.user_id for review in (await reloaded._load_reviews()).values()) == [1, 2, 3, 4, 5]
+
+@pytest.mark.asyncio
+async def test_flush_failure_reaches_every_waiter(review_service):
+    def failing_serialize():
+        raise OSError("disk full")
+    review_service._serialize_reviews = failing_serialize
+
+    results = await asyncio.gather(*(review_service._save_reviews() for _ in range(3)), return_exceptions=True)
+
+    assert len(results) == 3
+    assert all(isinstance(result, OSError) for result in results)
+    assert not review_service._pending_flushes
+
+@pytest.mark.asyncio
+async def test_totals_match_full_recompute(review_service):
+    created = []
+    for user_id, water_id, rating in [(1, 1, 5), (2, 1, 3), (3, 1, 4), (1, 2, 2), (2, 2, 5)]:
+        review = await review_service.create_review(
+            user_id, _review(water_id, rating, taste_rating=rating, is_verified_purchase=user_id == 2)
+        )
+        created.append(review)
+    for review in created[:4]:
+        await review_service.moderate_review(review.id, ReviewModeration(status=ReviewStatus.APPROVED))
+
+    await review_service.update_review(2, created[1].id, ReviewUpdate(rating=1))
+    await review_service.moderate_review(created[1].id, ReviewModeration(status=ReviewStatus.APPROVED))
+    await review_service.update_review(3, created[2].id, ReviewUpdate(title="Changed"))
+    await review_service.delete_review(1, created[0].id)
+
+    reviews = list(review_service._reviews_by_id.values())
+    for water_id in (1, 2):
+        approved = [r for r in reviews if r.water_id == water_id and r.status == ReviewStatus.APPROVED]
+        stats = await review_service.get_review_stats(water_id)
+        assert stats.total_reviews == len(approved)
+        expected_average = round(sum(r.rating for r in approved) / len(approved), 2) if approved else 0.0
+        assert stats.average_rating == expected_average
+        assert stats.rating_distribution == {
+            str(star): sum(1 for r in approved if round(r.rating) == star) for star in range(1, 6)
+        }
+    for user_id in (1, 2, 3):
+        own = [r for r in reviews if r.user_id == user_id]
+        summary = await review_service.get_user_review_summary(user_id)
+        assert summary.total_reviews == len(own)
+        assert summary.average_rating_given == round(sum(r.rating for r in own) / len(own), 2)
+        assert summary.verified_purchase_reviews == sum(1 for r in own if r.is_verified_purchase)
+
+@pytest.mark.asyncio
+async def test_update_with_null_rating_keeps_totals(review_service):
+    review = await review_service.create_review(1, _review(1, 4))
+    await review_service.moderate_review(review.id, ReviewModeration(status=ReviewStatus.APPROVED))
+
+    updated = await review_service.update_review(1, review.id, ReviewUpdate.model_validate({"rating": None}))
+
+    assert updated.rating == 4
+    assert (await review_service.get_user_review_summary(1)).average_rating_given == 4
+    assert (await review_service.get_review_stats(1)).average_rating == 4